@@ -4,36 +4,70 @@ Enhanced FastAPI v2 Startup Script
 Launches the advanced REST API with all enhanced features
 """
 
+import os
 import sys
 import argparse
+import importlib.util
 from pathlib import Path
 
 # Add the project root to the path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-def run_api_server(port: int = 8100, host: str = "127.0.0.1"):
-    """Run the FastAPI application"""
+def run_api_server(port: int = 8100, host: str = "127.0.0.1", workers: int = 1, access_log: bool = False,
+                   reload: bool = False):
+    """
+    Run the FastAPI application
+
+    With workers > 1 each uvicorn worker is a separate process with its own
+    vector store client, LLM service and answer caches. ChromaDB writes are
+    serialized across them by the collection file lock, and each write
+    replaces the collection's version file: every worker checks it before
+    using its caches, so an upload handled by one worker invalidates the
+    others' answers on their next lookup. reload is for development and
+    runs a single worker.
+    """
     import uvicorn
-    from rag_system.api.server import app
+    from rag_system.config import get_settings
+
+    debug = get_settings().debug
+    # 0 means one worker per CPU core
+    workers = 1 if reload else workers or os.cpu_count() or 1
 
-    print(f">> Starting DocuMentor API on {host}:{port}")
+    print(f">> Starting DocuMentor API on {host}:{port} ({workers} worker{'s' if workers != 1 else ''})")
     print("API Features:")
     print("  >> Technology-specific filtering (/technologies)")
     print("  >> Code generation (/generate-code)")
     print("  >> Q&A (/ask)")
     print("  >> Document upload and processing (/upload)")
-    print(f"\n>> API Documentation: http://{host}:{port}/docs")
-    print(f">> Interactive API Explorer: http://{host}:{port}/redoc")
+    if debug:
+        print(f"\n>> API Documentation: http://{host}:{port}/docs")
+        print(f">> Interactive API Explorer: http://{host}:{port}/redoc")
+    # uvloop and httptools come with uvicorn[standard]; choose them
+    # explicitly so a missing install is reported instead of silently
+    # falling back to the slower asyncio loop and h11 parser
+    has_uvloop = importlib.util.find_spec("uvloop") is not None
+    has_httptools = importlib.util.find_spec("httptools") is not None
+    if not (has_uvloop and has_httptools):
+        print("WARNING: uvloop/httptools not installed, using asyncio/h11 (pip install 'uvicorn[standard]')")
     print("=" * 60)
 
-    # Run FastAPI with uvicorn
+    # Run FastAPI with uvicorn. The app is passed as an import string so
+    # worker processes can import it themselves. The API has no websocket
+    # routes, so the websocket protocol is disabled.
     uvicorn.run(
-        app,
+        "rag_system.api.server:app",
         host=host,
         port=port,
-        reload=False,
-        log_level="info"
+        workers=workers,
+        loop="uvloop" if has_uvloop else "asyncio",
+        http="httptools" if has_httptools else "h11",
+        ws="none",
+        access_log=access_log or debug,
+        reload=reload,
+        # uvicorn's own startup and per-connection messages; the app's
+        # loggers are configured separately
+        log_level="info" if debug else "warning"
     )
 
 def main():
@@ -52,10 +86,28 @@ def main():
         help="Host to run the FastAPI app on (default: 127.0.0.1)"
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WORKERS", "1")),
+        help="Number of worker processes, 0 for one per CPU core (default: $WORKERS or 1)"
+    )
+    parser.add_argument(
+        "--access-log",
+        action="store_true",
+        help="Enable per-request access logging (off by default for throughput unless DEBUG is set)"
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="Restart on code changes (development only; runs a single worker)"
+    )
+
     args = parser.parse_args()
 
     try:
-        run_api_server(args.port, args.host)
+        run_api_server(args.port, args.host, workers=args.workers, access_log=args.access_log,
+                       reload=args.reload)
     except KeyboardInterrupt:
         print("\n>> API Server stopped")
     except Exception as e:
@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for running the DocuMentor API on several cores
+
+    gunicorn -c gunicorn_conf.py rag_system.api.server:app
+
+One uvicorn event loop is bound to a single core, so CPU-heavy work (query
+embedding, JSON encoding) is spread over worker processes instead.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '127.0.0.1')}:{os.getenv('PORT', '8100')}"
+# One per core: the 2n+1 rule is for sync workers blocked on I/O, while each
+# async worker already overlaps its requests, and every extra one loads its
+# own embedding model and vector store client.
+# Each worker also keeps its own answer, semantic and search caches, so a
+# question cached in one is answered again by the others. An upload handled
+# by any worker still reaches all of them: writes replace the collection's
+# version file, which every worker checks before using its caches. Set
+# WORKERS=1 for a single shared cache at the cost of one core.
+workers = int(os.getenv("WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# UvicornWorker takes its keep-alive from here; gunicorn's 2s default makes
+# clients reconnect between requests more often than uvicorn's own 5s
+keepalive = 5
+
+# LLM generations can take minutes
+timeout = 120
+graceful_timeout = 30
+
+# The app is imported in each worker rather than preloaded in the master:
+# the ChromaDB client holds SQLite handles and threads that must not be
+# shared across fork
+preload_app = False
+
+
+def post_fork(server, worker):
+    """Let only the first worker preload the LLM; the Ollama server is shared"""
+    if worker.age > 1:
+        os.environ["PRELOAD_LLM"] = "false"
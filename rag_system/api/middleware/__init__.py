@@ -10,6 +10,7 @@ from .validation import (
     validate_max_tokens,
     validate_file_upload,
     sanitize_filename,
+    UploadSizeLimitMiddleware,
 )
 
 __all__ = [
@@ -21,4 +22,5 @@ __all__ = [
     'validate_max_tokens',
     'validate_file_upload',
     'sanitize_filename',
+    'UploadSizeLimitMiddleware',
 ]
@@ -5,12 +5,19 @@ Validates file uploads, query parameters, and request data.
 Uses python-magic for content-based MIME type detection for enhanced security.
 """
 
+import os
+import urllib.parse
 from fastapi import UploadFile, HTTPException, status
-from typing import List, Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from fastapi.concurrency import run_in_threadpool
+from typing import Iterable, List, Optional
 import magic  # python-magic for content-based file type detection
 from pathlib import Path
 from rag_system.core.constants import (
     MAX_FILE_SIZE_BYTES,
+    MIME_SNIFF_BYTES,
+    MULTIPART_OVERHEAD_BYTES,
     ALL_SUPPORTED_EXTENSIONS,
     MIN_QUERY_LENGTH,
     MAX_QUERY_LENGTH,
@@ -23,6 +30,12 @@ from rag_system.core.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Characters that could cause filesystem issues, replaced in one pass
+_FILENAME_REPLACEMENTS = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+
+# Set for the per-upload membership check; the list keeps the error message's order
+_SUPPORTED_EXTENSIONS = frozenset(ALL_SUPPORTED_EXTENSIONS)
+
 # MIME type mapping for supported file types
 ALLOWED_MIME_TYPES = {
     # Text files
@@ -76,7 +89,7 @@ def validate_query(query: str) -> str:
     # Sanitize query: normalize whitespace by splitting and rejoining
     sanitized = ' '.join(query.strip().split())
 
-    logger.debug(f"Query validated: '{sanitized[:50]}...'")
+    logger.debug("Query validated: '%s...'", sanitized[:50])
     return sanitized
 
 
@@ -177,18 +190,30 @@ async def validate_file_upload(file: UploadFile) -> UploadFile:
     Raises:
         HTTPException: If file is invalid
     """
+    # Starlette makes any part with a filename parameter a file, even an empty one
+    if not file.filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded file has no filename"
+        )
+
     # Check file extension
     file_extension = Path(file.filename).suffix.lower()
-    if file_extension not in ALL_SUPPORTED_EXTENSIONS:
+    if file_extension not in _SUPPORTED_EXTENSIONS:
         logger.warning(f"File upload rejected: unsupported extension '{file_extension}'")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"{ERROR_INVALID_FILE_TYPE}. Supported: {', '.join(ALL_SUPPORTED_EXTENSIONS)}"
         )
 
-    # Read file content to check size and MIME type
-    content = await file.read()
-    file_size = len(content)
+    # Size and type are checked without reading the whole upload into
+    # memory: Starlette records the size while spooling (otherwise seek to
+    # the end of the spooled file), and libmagic only needs the header
+    file_size = file.size
+    if file_size is None:
+        file_size = await run_in_threadpool(file.file.seek, 0, os.SEEK_END)
+    await file.seek(0)
+    header = await file.read(MIME_SNIFF_BYTES)
 
     # Reset file pointer for later processing
     await file.seek(0)
@@ -203,8 +228,8 @@ async def validate_file_upload(file: UploadFile) -> UploadFile:
 
     # Validate MIME type using python-magic (content-based detection)
     try:
-        mime_type = magic.from_buffer(content, mime=True)
-        logger.debug(f"Detected MIME type: {mime_type} for file: {file.filename}")
+        mime_type = magic.from_buffer(header, mime=True)
+        logger.debug("Detected MIME type: %s for file: %s", mime_type, file.filename)
 
         # Check if MIME type is allowed
         if mime_type not in ALLOWED_MIME_TYPES:
@@ -216,7 +241,7 @@ async def validate_file_upload(file: UploadFile) -> UploadFile:
                     detail=f"{ERROR_INVALID_FILE_TYPE}. Detected type: {mime_type}"
                 )
 
-        logger.info(f"File upload validated: {file.filename} ({file_size} bytes, {mime_type})")
+        logger.info("File upload validated: %s (%d bytes, %s)", file.filename, file_size, mime_type)
 
     except Exception as e:
         logger.error(f"MIME type detection failed: {e}")
@@ -226,6 +251,39 @@ async def validate_file_upload(file: UploadFile) -> UploadFile:
     return file
 
 
+class UploadSizeLimitMiddleware:
+    """
+    Reject uploads whose declared Content-Length is over the limit with a 413,
+    before the body is read.
+
+    The upload endpoint can only check a file's size once Starlette has
+    parsed the multipart body, by which point the whole upload has been
+    received and spooled. Requests without a Content-Length (chunked) pass
+    through to that check.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int = MAX_FILE_SIZE_BYTES, paths: Iterable[str] = ("/upload",)):
+        self.app = app
+        self.max_body_size = max_size + MULTIPART_OVERHEAD_BYTES
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.paths:
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_body_size:
+                        logger.warning(f"Upload rejected: Content-Length {int(value)} exceeds limit")
+                        response = JSONResponse(
+                            {"detail": ERROR_FILE_TOO_LARGE},
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            headers={"Connection": "close"}
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename to prevent path traversal and other attacks.
@@ -239,8 +297,6 @@ def sanitize_filename(filename: str) -> str:
     Raises:
         HTTPException: If filename is empty or contains only invalid characters
     """
-    import urllib.parse
-
     # URL-decode the filename to catch encoded path traversal attempts
     try:
         filename = urllib.parse.unquote(filename)
@@ -255,9 +311,7 @@ def sanitize_filename(filename: str) -> str:
     filename = Path(filename).name
 
     # Remove any dangerous characters that could cause filesystem issues
-    dangerous_chars = ['<', '>', ':', '"', '/', '\\', '|', '?', '*']
-    for char in dangerous_chars:
-        filename = filename.replace(char, '_')
+    filename = filename.translate(_FILENAME_REPLACEMENTS)
 
     # Ensure the filename doesn't start with a dot (hidden file)
     # or consist only of dots (. or ..)
@@ -267,5 +321,5 @@ def sanitize_filename(filename: str) -> str:
             detail="Invalid filename"
         )
 
-    logger.debug(f"Sanitized filename: {filename}")
+    logger.debug("Sanitized filename: %s", filename)
     return filename
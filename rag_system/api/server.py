@@ -10,23 +10,44 @@ Production-ready with:
 - Structured Logging
 """
 
+from contextlib import asynccontextmanager
+import anyio
+import anyio.to_thread
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import BinaryIO, List, Optional, Dict, Any
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+import asyncio
 import json
 import io
+import sys
+import threading
 import time
 from pathlib import Path
 
+try:
+    import orjson  # noqa: F401 - required by ORJSONResponse
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
 from rag_system.core import DocumentChunker, VectorStore
+from rag_system.core.retrieval import SearchBatcher
 from rag_system.core.processing import document_processor
-from rag_system.core.generation.llm_handler import llm_service
+from rag_system.core.generation.llm_handler import LLMErrorMessage, llm_service
 from rag_system.core.search import web_search_provider
 from rag_system.config import get_settings
 from rag_system.api.middleware.auth import verify_api_key, optional_verify_api_key
@@ -37,6 +58,7 @@ from rag_system.api.middleware.validation import (
     validate_max_tokens,
     validate_file_upload,
     sanitize_filename,
+    UploadSizeLimitMiddleware,
 )
 from rag_system.core.utils.metrics import (
     track_request_duration,
@@ -45,13 +67,23 @@ from rag_system.core.utils.metrics import (
     record_api_request,
     record_auth_attempt,
     record_rate_limit_hit,
+    record_cache_hit,
+    record_cache_miss,
     update_vector_store_size,
 )
+from rag_system.core.utils.cache import SingleFlight, TTLCache, normalize_query
+from rag_system.core.utils.semantic_cache import SemanticCache
 from rag_system.core.constants import (
     RATE_LIMIT_SEARCH,
     RATE_LIMIT_UPLOAD,
     RATE_LIMIT_QUERY,
     RATE_LIMIT_GENERATION,
+    API_THREADPOOL_SIZE,
+    LLM_THREAD_LIMIT,
+    WEB_SEARCH_THREAD_LIMIT,
+    GZIP_MINIMUM_SIZE,
+    GZIP_COMPRESS_LEVEL,
+    STATS_CACHE_TTL,
     DEFAULT_SEARCH_K,
     MAX_SEARCH_K,
 )
@@ -72,6 +104,16 @@ TECHNOLOGY_MAPPING = {
     'langchain': 'LangChain'
 }
 
+def _canonical_technology(value: Any) -> Any:
+    """
+    Technology keys are lowercase identifiers; canonicalize client input once
+    at parse time. Interning lets the mapping and filter lookups that follow
+    compare by identity.
+    """
+    if isinstance(value, str):
+        return sys.intern(value.strip().lower())
+    return value
+
 class QueryRequest(BaseModel):
     question: str = Field(..., description="The user query")
     search_k: int = Field(default=8, description="Documents to retrieve")
@@ -83,6 +125,19 @@ class QueryRequest(BaseModel):
     max_tokens: int = Field(default=800)
     chunk_overlap: int = Field(default=2)
 
+    @field_validator('technology_filter', mode='before')
+    @classmethod
+    def _technology_filter(cls, value: Any) -> Any:
+        return _canonical_technology(value)
+
+    @field_validator('source_filter')
+    @classmethod
+    def _source_filter(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        # Sources are case-sensitive names, so only order and duplicates are
+        # normalized: equivalent lists then build the same Chroma filter and
+        # share cache entries
+        return sorted({sys.intern(source) for source in value}) if value else None
+
 class CodeGenerationRequest(BaseModel):
     prompt: str = Field(..., description="What to build")
     language: str = Field(default="python")
@@ -90,12 +145,25 @@ class CodeGenerationRequest(BaseModel):
     include_context: bool = True
     style: str = "complete"
 
+    @field_validator('technology', mode='before')
+    @classmethod
+    def _technology(cls, value: Any) -> Any:
+        return _canonical_technology(value)
+
 class TechnologyFilterRequest(BaseModel):
     technology: str
     question: str
     mode: str = "smart"
 
+    @field_validator('technology', mode='before')
+    @classmethod
+    def _technology(cls, value: Any) -> Any:
+        return _canonical_technology(value)
+
 class QueryResponse(BaseModel):
+    # Cached instances are shared between requests; model_copy makes per-request variants
+    model_config = ConfigDict(frozen=True)
+
     answer: str
     sources: List[Dict[str, Any]]
     response_time: float
@@ -105,7 +173,19 @@ class QueryResponse(BaseModel):
     response_mode: str
     search_metadata: Dict[str, Any]
 
+class TechnologyQueryResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    answer: str
+    technology: str
+    mode: str
+    sources: List[Dict[str, Any]]
+    response_time: float
+    source_count: int
+
 class SystemStatus(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     status: str
     providers: Dict[str, bool]
     document_count: int
@@ -115,266 +195,757 @@ class SystemStatus(BaseModel):
     system_version: str
 
 class TechnologyStatsResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     technology: str
     chunk_count: int
     sample_content: List[str]
     topics_covered: List[str]
 
+class CodeGenerationResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    code: str
+    language: str
+    technology: str
+    context_used: int
+    provider: str
+
+class UploadResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    success: bool
+    message: str
+    chunks_created: int
+    document_id: str
+    file_type: str
+    processing_metadata: Dict[str, Any]
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+MSGPACK_MEDIA_RANGES = ("application/msgpack", "application/x-msgpack")
+JSON_MEDIA_RANGES = ("application/json", "application/*", "*/*")
+
+def _accept_quality(accept: str, media_ranges: tuple) -> float:
+    """Highest q-value an Accept header gives any of the media ranges (0 if none is listed)"""
+    best = 0.0
+    for item in accept.split(","):
+        media_range, *params = item.split(";")
+        if media_range.strip().lower() not in media_ranges:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        best = max(best, quality)
+    return best
+
+def _accepts_msgpack(request: Request) -> bool:
+    """
+    Whether the client explicitly asks for MessagePack (q > 0) and does not
+    rank JSON above it; wildcards alone keep the JSON default.
+    """
+    if not HAS_MSGPACK:
+        return False
+    accept = request.headers.get("accept", "")
+    quality = _accept_quality(accept, MSGPACK_MEDIA_RANGES)
+    return quality > 0 and quality >= _accept_quality(accept, JSON_MEDIA_RANGES)
+
+def _json_response(model: BaseModel, request: Optional[Request] = None) -> Response:
+    """
+    Serialize a response model once, in pydantic-core.
+
+    Handlers build these models with model_construct from values they computed
+    themselves, and returning a Response skips FastAPI's re-validation against
+    the route's response_model; the decorator still documents the schema.
+
+    When the request is given, clients that accept MessagePack get the payload
+    in that format instead: chunk text is copied as-is rather than escaped.
+    """
+    if request is not None:
+        headers = {"Vary": "Accept"}
+        if _accepts_msgpack(request):
+            return Response(content=msgpack.packb(model.model_dump(mode="json")),
+                            media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+        return Response(content=model.model_dump_json(), media_type="application/json", headers=headers)
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+def _sse(payload: Dict[str, Any]) -> bytes:
+    """One server-sent event carrying a JSON payload"""
+    data = orjson.dumps(payload) if HAS_ORJSON else json.dumps(payload).encode()
+    return b"data: " + data + b"\n\n"
+
+def _answer_cache_key(body: QueryRequest) -> tuple:
+    """Exact-match cache key: normalized question plus every field that shapes the answer"""
+    return (
+        normalize_query(body.question),
+        body.response_mode,
+        body.technology_filter,
+        tuple(body.source_filter) if body.source_filter else None,
+        body.search_k,
+        body.chunk_overlap,
+        body.enable_web_search,
+        body.temperature,
+        body.max_tokens,
+    )
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application"""
 
     settings = get_settings()
 
+    async def _warm_retrieval() -> tuple:
+        """
+        Load the embedding model, then run one search with its vector.
+
+        Chroma loads a collection's HNSW index on the first query against it,
+        so without this the first user search pays for reading it from disk.
+        Returns the embedding and search times.
+        """
+        start = time.perf_counter()
+        embedding = await search_batcher.embed("warmup query")
+        embedded = time.perf_counter()
+        await search_batcher.search("warmup query", k=1, query_embedding=embedding)
+        return embedded - start, time.perf_counter() - embedded
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Plain `def` endpoints and run_in_threadpool calls share anyio's thread pool
+        anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+        # Loading a local LLM can take tens of seconds, so it warms in the
+        # background instead of holding up startup. With several workers
+        # only one needs to, since they share the Ollama server
+        if settings.preload_llm:
+            app.state.llm_preload = asyncio.create_task(_run_llm(llm_service.preload))
+
+        # Warm the stats cache (so the first status poll doesn't scan the
+        # collection) and the retrieval path, side by side
+        _, warmed = await asyncio.gather(
+            run_in_threadpool(_cached_stats),
+            _warm_retrieval(),
+            return_exceptions=True
+        )
+        if isinstance(warmed, Exception):
+            logger.warning(f"Retrieval warm-up failed: {warmed}")
+        else:
+            logger.info("Embedding model warmed up in %.2fs, first search took %.2fs", *warmed)
+        yield
+        await search_batcher.close()
+
     app = FastAPI(
         title="DocuMentor API",
         description="API for Documentation Assistant",
         version="2.0.0",
-        docs_url="/docs",
-        redoc_url="/redoc"
+        # Interactive docs and the OpenAPI schema are development aids; in
+        # production they only expose the schema to scanners
+        docs_url="/docs" if settings.debug else None,
+        redoc_url="/redoc" if settings.debug else None,
+        openapi_url="/openapi.json" if settings.debug else None,
+        lifespan=lifespan,
+        # orjson serializes the nested source lists several times faster
+        default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse
     )
 
     limiter = Limiter(key_func=get_remote_address)
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.cors_origins,
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE"],
-        allow_headers=["*"],
-    )
+    # Only browsers on other origins need CORS; with no origins configured
+    # (e.g. the UI is served same-origin behind a proxy) the middleware
+    # would only add a layer to every request
+    if settings.cors_origins:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=settings.cors_origins,
+            allow_credentials=True,
+            allow_methods=["GET", "POST", "PUT", "DELETE"],
+            allow_headers=["*"],
+        )
+
+    # Answers and source lists are JSON text that compresses several-fold
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+    # Outermost, so oversized uploads are turned away before any layer
+    # (or the multipart parser) touches the body
+    app.add_middleware(UploadSizeLimitMiddleware, max_size=settings.max_file_size)
 
     vector_store = VectorStore()
+    # Concurrent requests share embedding passes and ChromaDB queries
+    search_batcher = SearchBatcher(vector_store)
     chunker = DocumentChunker()
+    answer_cache = TTLCache(maxsize=settings.max_cache_size, ttl=settings.cache_ttl)
+    # Answer cache key -> (cached response, its JSON without response_time)
+    rendered_answers = TTLCache(maxsize=settings.max_cache_size, ttl=settings.cache_ttl)
+    semantic_cache = SemanticCache(
+        threshold=settings.semantic_cache_threshold, maxsize=settings.max_cache_size, ttl=settings.cache_ttl
+    )
+    # Collection stats and the rendered /status, /technologies and
+    # per-technology stats bodies
+    stats_cache = TTLCache(maxsize=3 + len(TECHNOLOGY_MAPPING), ttl=STATS_CACHE_TTL)
+    # LLM calls can take minutes; capping their threads separately keeps
+    # slow generations from using up the pool that search and embedding need.
+    # Concurrent generations are batched by the LLM server itself (Ollama
+    # decodes up to OLLAMA_NUM_PARALLEL of them together), so the cap can be
+    # matched to its slots instead of queueing threads behind it
+    llm_limiter = anyio.CapacityLimiter(settings.llm_max_concurrency or LLM_THREAD_LIMIT)
+
+    async def _run_llm(func, *args):
+        """Run a blocking LLM call on a worker thread under the LLM limiter"""
+        return await anyio.to_thread.run_sync(func, *args, limiter=llm_limiter)
+
+    # Web lookups wait seconds on remote sites; their own cap keeps a burst
+    # of them from holding the threads status polls and embedding run on
+    web_search_limiter = anyio.CapacityLimiter(WEB_SEARCH_THREAD_LIMIT)
+
+    async def _search_web(question: str) -> List[Dict]:
+        """Web results for a question, fetched on a worker thread under the web search limiter"""
+        return await anyio.to_thread.run_sync(
+            web_search_provider.search_web, question, 3, limiter=web_search_limiter
+        )
+
+    def _cached_answer_response(cache_key: tuple, response: BaseModel, start_time: float, request: Request) -> Response:
+        """
+        Serve a cached answer with a fresh response_time.
+
+        Only the time differs between hits, so the rest of the JSON (answer
+        text and every source) is rendered once per cached answer and the
+        time is appended to it.
+        """
+        response_time = time.perf_counter() - start_time
+        if _accepts_msgpack(request):
+            return _json_response(response.model_copy(update={"response_time": response_time}), request)
+
+        rendered = rendered_answers.get(cache_key)
+        if rendered is None or rendered[0] is not response:
+            rendered = (response, response.model_dump_json(exclude={"response_time"}).encode())
+            rendered_answers.set(cache_key, rendered)
+        body = rendered[1][:-1] + b',"response_time":' + repr(response_time).encode() + b'}'
+        return Response(content=body, media_type="application/json", headers={"Vary": "Accept"})
+
+    # /ask requests currently computing an answer, by answer cache key
+    inflight_answers = SingleFlight()
+
+    # One lock per stats_cache key, so pollers that miss together wait for a
+    # single recomputation instead of each scanning the collection
+    stats_locks: Dict[Any, threading.Lock] = {}
+
+    # Collection version the caches below were filled under. Every worker
+    # process has its own caches, so one that didn't handle an upload (or an
+    # ingest run outside the API) learns about it from the vector store
+    cached_version = vector_store.data_version()
+
+    def _drop_stale_caches():
+        """Clear answer and stats caches if any process has written to the collection since they were filled"""
+        nonlocal cached_version
+        version = vector_store.data_version()
+        if version != cached_version:
+            cached_version = version
+            answer_cache.clear()
+            rendered_answers.clear()
+            semantic_cache.clear()
+            stats_cache.clear()
+
+    def _stats_entry(key: Any, compute) -> Any:
+        """stats_cache entry for key, computed by one caller when missing"""
+        _drop_stale_caches()
+        value = stats_cache.get(key)
+        if value is None:
+            with stats_locks.setdefault(key, threading.Lock()):
+                value = stats_cache.get(key)
+                if value is None:
+                    value = compute()
+                    stats_cache.set(key, value)
+        return value
+
+    def _cached_stats() -> Dict:
+        """Collection stats, recomputed at most once per STATS_CACHE_TTL seconds"""
+        return _stats_entry('stats', vector_store.get_collection_stats)
 
     logger.info("API initialized")
 
+    # The root body never changes, so it is serialized once
+    root_body = json.dumps({
+        "message": "DocuMentor API",
+        "version": "2.0.0",
+        "status": "/status",
+    }).encode()
+
     @app.get("/", tags=["General"])
     async def root():
-        return {
-            "message": "DocuMentor API",
-            "version": "2.0.0",
-            "status": "/status",
-        }
+        return Response(content=root_body, media_type="application/json")
+
+    def _render_status() -> str:
+        """/status body: collection stats plus a live check of every provider"""
+        stats = _cached_stats()
+        provider_status = llm_service.get_provider_status()
+        update_vector_store_size(stats.get('total_chunks', 0))
+
+        return SystemStatus.model_construct(
+            status="operational",
+            providers=provider_status,
+            document_count=stats.get('total_chunks', 0),
+            available_sources=list(stats.get('sources', {}).keys()),
+            available_technologies=list(TECHNOLOGY_MAPPING.values()),
+            supported_formats=document_processor.get_supported_formats(),
+            system_version="2.0.0"
+        ).model_dump_json()
 
     @app.get("/status", response_model=SystemStatus, tags=["General"])
-    async def get_status():
+    def get_status():
         """Get system status"""
         try:
-            stats = vector_store.get_collection_stats()
-            provider_status = llm_service.get_provider_status()
-            update_vector_store_size(stats.get('total_chunks', 0))
-
-            return SystemStatus(
-                status="operational",
-                providers=provider_status,
-                document_count=stats.get('total_chunks', 0),
-                available_sources=list(stats.get('sources', {}).keys()),
-                available_technologies=list(TECHNOLOGY_MAPPING.values()),
-                supported_formats=document_processor.get_supported_formats(),
-                system_version="2.0.0"
-            )
+            # Status pollers get the body rendered at the last refresh: the
+            # provider checks are network round trips (Ollama, for one) and
+            # nothing here changes between uploads
+            body = _stats_entry('status_body', _render_status)
+            return Response(content=body, media_type="application/json")
         except Exception as e:
             logger.error(f"Status check failed: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.get("/metrics", tags=["Monitoring"])
-    async def get_metrics():
+    def get_metrics():
+        # A plain def so FastAPI runs it on the thread pool: rendering walks
+        # every collector under the locks request threads take to record
+        # metrics, and that wait must not stall the event loop
         return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
+    @app.get("/cache/stats", tags=["Monitoring"])
+    async def get_cache_stats():
+        """Get answer cache hit/miss statistics"""
+        return {
+            "answer_cache": answer_cache.get_stats(),
+            "search_batching": search_batcher.get_stats(),
+            "semantic_cache": semantic_cache.get_stats()
+        }
+
+    def _render_technologies() -> bytes:
+        """/technologies body: which technologies have indexed chunks"""
+        stats = _cached_stats()
+        technologies = []
+
+        for tech_key, tech_name in TECHNOLOGY_MAPPING.items():
+            tech_results = vector_store.sample_metadatas({"technology": tech_key}, limit=1)
+            technologies.append({
+                "key": tech_key,
+                "name": tech_name,
+                "available": len(tech_results) > 0
+            })
+
+        return json.dumps({
+            "total_technologies": len(TECHNOLOGY_MAPPING),
+            "technologies": technologies,
+            "total_chunks": stats.get('total_chunks', 0)
+        }).encode()
+
     @app.get("/technologies", tags=["Technologies"])
-    async def list_technologies():
+    def list_technologies():
         """List available technologies"""
         try:
-            stats = vector_store.get_collection_stats()
-            technologies = []
-
-            for tech_key, tech_name in TECHNOLOGY_MAPPING.items():
-                tech_filter = {"technology": tech_key}
-                tech_results = vector_store.search("overview", k=1, filter_dict=tech_filter)
-                technologies.append({
-                    "key": tech_key,
-                    "name": tech_name,
-                    "available": len(tech_results) > 0
-                })
-
-            return {
-                "total_technologies": len(TECHNOLOGY_MAPPING),
-                "technologies": technologies,
-                "total_chunks": stats.get('total_chunks', 0)
-            }
+            # One metadata lookup per technology; dashboards poll this, and
+            # the answer only changes after an upload clears the cache, so
+            # the encoded body is what gets cached
+            body = _stats_entry('technologies_body', _render_technologies)
+            return Response(content=body, media_type="application/json")
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
     @app.get("/technologies/{technology}/stats", response_model=TechnologyStatsResponse, tags=["Technologies"])
-    async def get_technology_stats(technology: str):
+    def get_technology_stats(technology: str):
         if technology not in TECHNOLOGY_MAPPING:
             raise HTTPException(status_code=404, detail="Technology not found")
             
-        tech_filter = {"technology": technology}
-        results = vector_store.search("", k=5, filter_dict=tech_filter)
-        
-        return TechnologyStatsResponse(
-            technology=TECHNOLOGY_MAPPING[technology],
-            chunk_count=len(results),
-            sample_content=[r.get('content', '')[:100] for r in results],
-            topics_covered=[]
-        )
+        def render() -> str:
+            results = vector_store.get_by_metadata({"technology": technology}, limit=5)
+            return TechnologyStatsResponse.model_construct(
+                technology=TECHNOLOGY_MAPPING[technology],
+                chunk_count=len(results),
+                sample_content=[r.get('content', '')[:100] for r in results],
+                topics_covered=[]
+            ).model_dump_json()
+
+        body = _stats_entry(('technology', technology), render)
+        return Response(content=body, media_type="application/json")
+
+    async def _retrieve(body: QueryRequest, query_embedding: List[float], web_task: Optional[asyncio.Future]) -> List[Dict]:
+        """Vector hits for a question under its request filters, followed by any web results"""
+        combined_filter = {}
+
+        if body.technology_filter and body.technology_filter in TECHNOLOGY_MAPPING:
+            combined_filter = {
+                "$and": [
+                    {"technology": body.technology_filter},
+                    {"source": "comprehensive_docs"}
+                ]
+            }
 
-    @app.post("/ask", response_model=QueryResponse, tags=["Q&A"])
-    @limiter.limit(f"{RATE_LIMIT_QUERY}/minute")
-    async def ask_question(http_request: Request, request: QueryRequest):
-        """Ask a question"""
-        try:
-            start_time = time.time()
-            combined_filter = {}
+        if body.source_filter:
+            combined_filter["source"] = {"$in": body.source_filter}
+
+        filter_dict = combined_filter if combined_filter else None
 
-            if request.technology_filter and request.technology_filter in TECHNOLOGY_MAPPING:
-                combined_filter = {
-                    "$and": [
-                        {"technology": request.technology_filter},
-                        {"source": "comprehensive_docs"}
-                    ]
-                }
+        search_results = []
+        if body.response_mode != "web_only":
+            search_results = await search_batcher.search(
+                body.question,
+                k=body.search_k + body.chunk_overlap,
+                filter_dict=filter_dict,
+                query_embedding=query_embedding
+            )
 
-            if request.source_filter:
-                combined_filter["source"] = {"$in": request.source_filter}
+        # Web results follow the vector hits
+        if web_task is not None:
+            search_results = search_results + await web_task
 
-            filter_dict = combined_filter if combined_filter else None
-            
-            search_results = []
-            if request.response_mode != "web_only":
-                search_results = vector_store.search(
-                    request.question,
-                    k=request.search_k + request.chunk_overlap,
-                    filter_dict=filter_dict
-                )
+        return search_results
 
-            if request.enable_web_search:
-                search_results.extend(web_search_provider.search_web(request.question, max_results=3))
+    async def _answer_question(body: QueryRequest, cache_key: tuple, start_time: float) -> QueryResponse:
+        """Answer a question that missed the exact-match cache"""
+        # Web search needs neither the query embedding nor the semantic cache
+        # verdict, so start it first: it then runs under the embedding, cache
+        # check and vector search instead of after them
+        web_task = None
+        if body.enable_web_search:
+            web_task = asyncio.ensure_future(_search_web(body.question))
 
-            if request.response_mode == "code_generation":
-                prompt = f"Provide a complete code implementation for: {request.question}"
-                answer = llm_service.generate_code(prompt, "python", search_results[:5])
-                if "```" not in answer:
+        try:
+            # L2 semantic cache: paraphrases of an answered question reuse its
+            # answer; the scope is every request option except the question.
+            # The same vector feeds the search below, so a miss embeds once
+            scope = cache_key[1:]
+            query_embedding = await search_batcher.embed(body.question)
+            cached = semantic_cache.get(query_embedding, body.question, scope)
+            if cached is not None:
+                record_cache_hit('semantic')
+                # Not copied into answer_cache: that would restart the
+                # answer's TTL, letting paraphrases keep it alive indefinitely
+                return cached.model_copy(update={"response_time": time.perf_counter() - start_time})
+            record_cache_miss('semantic')
+
+            search_results = await _retrieve(body, query_embedding, web_task)
+
+            if body.response_mode == "code_generation":
+                prompt = f"Provide a complete code implementation for: {body.question}"
+                answer = await _run_llm(llm_service.generate_code, prompt, "python", search_results[:5])
+                failed = isinstance(answer, LLMErrorMessage)
+                if not failed and "```" not in answer:
                     answer = f"```python\n{answer}\n```"
             else:
-                answer = llm_service.generate_answer(f"Question: {request.question}", search_results)
+                answer = await _run_llm(llm_service.generate_answer, f"Question: {body.question}", search_results)
+                failed = isinstance(answer, LLMErrorMessage)
 
-            return QueryResponse(
+            # Every field is computed here, so skip validating them again
+            response = QueryResponse.model_construct(
                 answer=answer,
                 sources=search_results,
-                response_time=time.time() - start_time,
+                response_time=time.perf_counter() - start_time,
                 provider_used=llm_service.current_provider,
                 source_count=len(search_results),
-                technology_context=TECHNOLOGY_MAPPING.get(request.technology_filter),
-                response_mode=request.response_mode,
-                search_metadata={"web_search": request.enable_web_search}
+                technology_context=TECHNOLOGY_MAPPING.get(body.technology_filter),
+                response_mode=body.response_mode,
+                search_metadata={"web_search": body.enable_web_search}
+            )
+            # A provider failure is returned but not cached, so the next
+            # request retries generation instead of replaying the outage
+            if not failed:
+                answer_cache.set(cache_key, response)
+                semantic_cache.add(query_embedding, body.question, response, scope)
+            return response
+        finally:
+            # Drop a web search whose result is no longer needed (cache hit or error)
+            if web_task is not None and not web_task.done():
+                web_task.cancel()
+
+    @app.post("/ask", response_model=QueryResponse, tags=["Q&A"])
+    @limiter.limit(f"{RATE_LIMIT_QUERY}/minute")
+    async def ask_question(request: Request, body: QueryRequest):
+        """Ask a question"""
+        try:
+            start_time = time.perf_counter()
+
+            # L1 exact-match cache: repeated questions skip search and generation
+            cache_key = _answer_cache_key(body)
+            _drop_stale_caches()
+            cached = answer_cache.get(cache_key)
+            if cached is not None:
+                record_cache_hit('answer')
+                return _cached_answer_response(cache_key, cached, start_time, request)
+            record_cache_miss('answer')
+
+            # Identical questions arriving while one is being answered wait
+            # for that answer instead of each running search and generation
+            response, shared = await inflight_answers.run(
+                cache_key, lambda: _answer_question(body, cache_key, start_time)
             )
+            if shared:
+                record_cache_hit('inflight')
+                return _cached_answer_response(cache_key, response, start_time, request)
+            return _json_response(response, request)
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    @app.post("/generate-code", tags=["Code Generation"])
+    async def _replay_events(response: QueryResponse, start_time: float):
+        """Events for an answer that is already complete"""
+        yield _sse({"sources": response.sources, "source_count": response.source_count})
+        yield _sse({"token": response.answer})
+        yield _sse({"done": True, "response_time": time.perf_counter() - start_time,
+                    "provider_used": response.provider_used})
+
+    async def _stream_events(body: QueryRequest, cache_key: tuple, start_time: float):
+        """Sources as soon as retrieval finishes, then each answer token as the LLM produces it"""
+        _drop_stale_caches()
+        cached = answer_cache.get(cache_key)
+        if cached is not None:
+            record_cache_hit('answer')
+            async for event in _replay_events(cached, start_time):
+                yield event
+            return
+        record_cache_miss('answer')
+
+        web_task = None
+        if body.enable_web_search:
+            web_task = asyncio.ensure_future(_search_web(body.question))
+        tokens = None
+
+        try:
+            scope = cache_key[1:]
+            query_embedding = await search_batcher.embed(body.question)
+            cached = semantic_cache.get(query_embedding, body.question, scope)
+            if cached is not None:
+                record_cache_hit('semantic')
+                async for event in _replay_events(cached, start_time):
+                    yield event
+                return
+            record_cache_miss('semantic')
+
+            search_results = await _retrieve(body, query_embedding, web_task)
+            yield _sse({"sources": search_results, "source_count": len(search_results)})
+
+            if body.response_mode == "code_generation":
+                # The fence check needs the whole answer, so code is sent in one piece
+                prompt = f"Provide a complete code implementation for: {body.question}"
+                answer = await _run_llm(llm_service.generate_code, prompt, "python", search_results[:5])
+                failed = isinstance(answer, LLMErrorMessage)
+                if not failed and "```" not in answer:
+                    answer = f"```python\n{answer}\n```"
+                yield _sse({"token": answer})
+            else:
+                # Each next() blocks until the provider sends its next piece,
+                # so it runs on a worker thread under the LLM limiter
+                tokens = llm_service.stream_answer(f"Question: {body.question}", search_results)
+                parts = []
+                failed = False
+                while (token := await anyio.to_thread.run_sync(next, tokens, None, limiter=llm_limiter)) is not None:
+                    # The provider can fail part-way, after real tokens
+                    failed = failed or isinstance(token, LLMErrorMessage)
+                    parts.append(token)
+                    yield _sse({"token": token})
+                answer = "".join(parts)
+
+            response_time = time.perf_counter() - start_time
+            yield _sse({"done": True, "response_time": response_time, "provider_used": llm_service.current_provider})
+
+            # A completed stream is cached like an /ask answer, so either
+            # endpoint can serve it next time; a failed one is not cached
+            if failed:
+                return
+            response = QueryResponse.model_construct(
+                answer=answer,
+                sources=search_results,
+                response_time=response_time,
+                provider_used=llm_service.current_provider,
+                source_count=len(search_results),
+                technology_context=TECHNOLOGY_MAPPING.get(body.technology_filter),
+                response_mode=body.response_mode,
+                search_metadata={"web_search": body.enable_web_search}
+            )
+            answer_cache.set(cache_key, response)
+            semantic_cache.add(query_embedding, body.question, response, scope)
+        finally:
+            # Client gone or request failed: stop the provider's stream and any pending web search
+            if tokens is not None:
+                tokens.close()
+            if web_task is not None and not web_task.done():
+                web_task.cancel()
+
+    @app.post("/ask/stream", tags=["Q&A"])
+    @limiter.limit(f"{RATE_LIMIT_QUERY}/minute")
+    async def ask_question_stream(request: Request, body: QueryRequest):
+        """Ask a question and receive the answer as server-sent events"""
+        start_time = time.perf_counter()
+        return StreamingResponse(
+            _stream_events(body, _answer_cache_key(body), start_time),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    @app.post("/generate-code", response_model=CodeGenerationResponse, tags=["Code Generation"])
     @limiter.limit(f"{RATE_LIMIT_GENERATION}/minute")
-    async def generate_code(http_request: Request, request: CodeGenerationRequest):
+    async def generate_code(request: Request, body: CodeGenerationRequest):
         """Generate code"""
         try:
             context = []
-            if request.include_context:
-                search_query = f"{request.language} {request.prompt}"
-                filter_dict = {"technology": request.technology} if request.technology in TECHNOLOGY_MAPPING else None
-                context = vector_store.search(search_query, k=5, filter_dict=filter_dict)
-
-            code = llm_service.generate_code(
-                f"Generate {request.style} {request.language} code. Request: {request.prompt}",
-                request.language,
+            if body.include_context:
+                search_query = f"{body.language} {body.prompt}"
+                filter_dict = {"technology": body.technology} if body.technology in TECHNOLOGY_MAPPING else None
+                context = await search_batcher.search(search_query, k=5, filter_dict=filter_dict)
+
+            code = await _run_llm(
+                llm_service.generate_code,
+                f"Generate {body.style} {body.language} code. Request: {body.prompt}",
+                body.language,
                 context
             )
 
-            return {
-                "code": code,
-                "language": request.language,
-                "technology": TECHNOLOGY_MAPPING.get(request.technology, "General"),
-                "context_used": len(context),
-                "provider": llm_service.current_provider
-            }
+            return _json_response(CodeGenerationResponse.model_construct(
+                code=code,
+                language=body.language,
+                technology=TECHNOLOGY_MAPPING.get(body.technology, "General"),
+                context_used=len(context),
+                provider=llm_service.current_provider
+            ), request)
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    @app.post("/technology-query", tags=["Technology Queries"])
+    @app.post("/technology-query", response_model=TechnologyQueryResponse, tags=["Technology Queries"])
     @limiter.limit(f"{RATE_LIMIT_QUERY}/minute")
-    async def technology_specific_query(http_request: Request, request: TechnologyFilterRequest):
+    async def technology_specific_query(request: Request, body: TechnologyFilterRequest):
         """Query with technology-specific filtering and context"""
         try:
-            if request.technology not in TECHNOLOGY_MAPPING:
-                raise HTTPException(status_code=400, detail=f"Technology '{request.technology}' not supported")
-
-            import time
-            start_time = time.time()
+            if body.technology not in TECHNOLOGY_MAPPING:
+                raise HTTPException(status_code=400, detail=f"Technology '{body.technology}' not supported")
+
+            start_time = time.perf_counter()
+
+            # Same two cache tiers as /ask: exact repeats, then paraphrases
+            # (scoped to this technology and mode) skip search and generation
+            cache_key = ("technology-query", normalize_query(body.question), body.technology, body.mode)
+            _drop_stale_caches()
+            cached = answer_cache.get(cache_key)
+            if cached is not None:
+                record_cache_hit('answer')
+                return _cached_answer_response(cache_key, cached, start_time, request)
+            record_cache_miss('answer')
+
+            scope = cache_key[:1] + cache_key[2:]
+            query_embedding = await search_batcher.embed(body.question)
+            cached = semantic_cache.get(query_embedding, body.question, scope)
+            if cached is not None:
+                record_cache_hit('semantic')
+                return _cached_answer_response(cache_key, cached, start_time, request)
+            record_cache_miss('semantic')
 
             # Technology-specific filter
             tech_filter = {
                 "$and": [
-                    {"technology": request.technology},
+                    {"technology": body.technology},
                     {"source": "comprehensive_docs"}
                 ]
             }
 
             # Search with technology filter
-            search_results = vector_store.search(
-                request.question,
+            search_results = await search_batcher.search(
+                body.question,
                 k=8,
-                filter_dict=tech_filter
+                filter_dict=tech_filter,
+                query_embedding=query_embedding
             )
 
             # Generate technology-focused response
-            tech_name = TECHNOLOGY_MAPPING[request.technology]
-
-            if request.mode == "code":
-                prompt = f"Provide {tech_name} code implementation for: {request.question}"
-                answer = enhanced_llm_handler.generate_code(prompt, "python", search_results)
-            elif request.mode == "detailed":
-                prompt = f"Provide detailed {tech_name} documentation and examples for: {request.question}"
-                answer = enhanced_llm_handler.generate_answer(prompt, search_results)
+            tech_name = TECHNOLOGY_MAPPING[body.technology]
+
+            if body.mode == "code":
+                prompt = f"Provide {tech_name} code implementation for: {body.question}"
+                answer = await _run_llm(llm_service.generate_code, prompt, "python", search_results)
+            elif body.mode == "detailed":
+                prompt = f"Provide detailed {tech_name} documentation and examples for: {body.question}"
+                answer = await _run_llm(llm_service.generate_answer, prompt, search_results)
             else:  # smart
-                prompt = f"Explain how to {request.question} using {tech_name}. Include practical examples."
-                answer = enhanced_llm_handler.generate_answer(prompt, search_results)
-
-            response_time = time.time() - start_time
-
-            return {
-                "answer": answer,
-                "technology": tech_name,
-                "mode": request.mode,
-                "sources": search_results,
-                "response_time": response_time,
-                "source_count": len(search_results)
-            }
+                prompt = f"Explain how to {body.question} using {tech_name}. Include practical examples."
+                answer = await _run_llm(llm_service.generate_answer, prompt, search_results)
+
+            response_time = time.perf_counter() - start_time
+
+            response = TechnologyQueryResponse.model_construct(
+                answer=answer,
+                technology=tech_name,
+                mode=body.mode,
+                sources=search_results,
+                response_time=response_time,
+                source_count=len(search_results)
+            )
+            # As on /ask, a provider failure is returned but never cached
+            if not isinstance(answer, LLMErrorMessage):
+                answer_cache.set(cache_key, response)
+                semantic_cache.add(query_embedding, body.question, response, scope)
+            return _json_response(response, request)
 
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Technology query failed: {str(e)}")
 
-    # Include all original endpoints for backward compatibility
-    @app.post("/ask", response_model=EnhancedQuestionResponse, tags=["Q&A"])
-    @limiter.limit(f"{RATE_LIMIT_QUERY}/minute")
-    async def ask_question_legacy(http_request: Request, request: EnhancedQuestionRequest):
-        """Legacy ask endpoint - redirects to enhanced version"""
-        return await ask_enhanced_question(http_request, request)
+    def _process_upload(filename: str, content: BinaryIO, source: str, file_extension: str) -> UploadResponse:
+        """Parse, chunk and store an uploaded file (blocking; run off the event loop)"""
+        result = document_processor.process_file(filename, content)
+
+        if not result['success']:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Document processing failed: {result['metadata'].get('error', 'Unknown error')}"
+            )
+
+        # Create document object with enhanced metadata
+        document = {
+            'title': filename,
+            'content': result['content'],
+            'source': source,
+            'file_type': file_extension,
+            'upload_timestamp': time.time()
+        }
+
+        # Chunk the document
+        chunks = chunker.chunk_document(document)
 
-    @app.post("/upload", tags=["Documents"])
+        if not chunks:
+            raise HTTPException(status_code=400, detail="Failed to create chunks from document")
+
+        # One batched write for the whole file; add_documents splits it into
+        # upsert batches sized for the embedding model
+        added = vector_store.add_chunks(chunks, f"upload_{filename}")
+
+        # New content can change answers, so cached ones are stale; other
+        # workers see the new collection version on their next lookup
+        _drop_stale_caches()
+
+        return UploadResponse.model_construct(
+            success=True,
+            message=f"Successfully processed {filename}",
+            chunks_created=added,
+            document_id=f"upload_{filename}",
+            file_type=file_extension,
+            processing_metadata=result.get('metadata', {})
+        )
+
+    @app.post("/upload", response_model=UploadResponse, tags=["Documents"])
     @limiter.limit(f"{RATE_LIMIT_UPLOAD}/minute")
     async def upload_document(
-        http_request: Request,
+        request: Request,
         file: UploadFile = File(...),
         source: str = Form(default="api_upload")
     ):
         """Upload and process a document (enhanced version)"""
         try:
+            # Starlette makes any part with a filename parameter a file,
+            # even an empty one
+            if not file.filename:
+                raise HTTPException(status_code=400, detail="Uploaded file has no filename")
+
             # Check file format
             file_extension = Path(file.filename).suffix.lower()
             if not document_processor.is_supported(file_extension):
@@ -383,47 +954,17 @@ def create_app() -> FastAPI:
                     detail=f"Unsupported file format: {file_extension}"
                 )
 
-            # Read file content
-            content = await file.read()
-
-            # Process document
-            result = document_processor.process_file(file.filename, content)
-
-            if not result['success']:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Document processing failed: {result['metadata'].get('error', 'Unknown error')}"
-                )
-
-            # Create document object with enhanced metadata
-            document = {
-                'title': file.filename,
-                'content': result['content'],
-                'source': source,
-                'file_type': file_extension,
-                'upload_timestamp': time.time()
-            }
-
-            # Chunk the document
-            chunks = chunker.chunk_document(document)
-
-            if chunks:
-                texts = [chunk['content'] for chunk in chunks]
-                metadatas = [chunk['metadata'] for chunk in chunks]
-                ids = [f"upload_{file.filename}_{i}" for i in range(len(chunks))]
-
-                added = vector_store.add_documents(texts, metadatas, ids)
-
-                return {
-                    "success": True,
-                    "message": f"Successfully processed {file.filename}",
-                    "chunks_created": added,
-                    "document_id": f"upload_{file.filename}",
-                    "file_type": file_extension,
-                    "processing_metadata": result.get('metadata', {})
-                }
-            else:
-                raise HTTPException(status_code=400, detail="Failed to create chunks from document")
+            # Starlette has already spooled the body to a temp file (on disk
+            # past 1 MB); hand that stream to the processor instead of reading
+            # the whole upload into memory
+            if file.size is not None and file.size > settings.max_file_size:
+                raise HTTPException(status_code=413, detail="File too large")
+            await file.seek(0)
+
+            # Parsing, embedding and the ChromaDB write all block, so keep
+            # them off the event loop
+            response = await run_in_threadpool(_process_upload, file.filename, file.file, source, file_extension)
+            return _json_response(response, request)
 
         except HTTPException:
             raise
@@ -25,7 +25,7 @@ class Settings(BaseSettings):
     # added common dev ports here
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:8501", "http://127.0.0.1:8501", "http://127.0.0.1:8506"],
-        description="Allowed CORS origins (use ['*'] only for development)"
+        description="Allowed CORS origins (use ['*'] only for development, [] to disable CORS)"
     )
     api_key: Optional[str] = Field(default=None, description="API key for authentication - set this in production!")
 
@@ -33,6 +33,12 @@ class Settings(BaseSettings):
     ollama_host: str = Field(default="localhost:11434", description="Ollama server host")
     ollama_model: str = Field(default="gemma2:2b", description="gemma2:2b is fast and good enough for most things")
     ollama_timeout: int = Field(default=120, description="Ollama can be slow, so generous timeout")
+    ollama_keep_alive: str = Field(default="30m", description="How long Ollama keeps the model (and its prompt cache) loaded between requests")
+    preload_llm: bool = Field(default=True, description="Load the LLM model when the API starts instead of on the first question")
+    llm_max_concurrency: Optional[int] = Field(
+        default=None,
+        description="Generations the API runs at once (default 32); set to Ollama's OLLAMA_NUM_PARALLEL so they share its batches"
+    )
 
     # Vector Database Configuration
     vectordb_path: str = Field(default="./data/vectordb", description="Vector database path")
@@ -40,6 +46,12 @@ class Settings(BaseSettings):
     collection_name: str = Field(default="documents", description="Collection name")
     embedding_model: str = Field(default="all-MiniLM-L6-v2", description="Good balance of speed and quality")
     embedding_dimension: int = Field(default=384, description="Dimension for all-MiniLM-L6-v2")
+    hnsw_ef_search: int = Field(default=64, description="HNSW candidates explored per query; lower is faster, higher recalls more")
+    embedding_backend: str = Field(default="torch", description="sentence-transformers backend: torch, onnx or openvino")
+    embedding_model_file: Optional[str] = Field(
+        default=None,
+        description="Model file for the onnx/openvino backends, e.g. onnx/model_qint8_avx512_vnni.onnx for int8 weights"
+    )
 
     # Chunking Configuration
     # these values worked well in testing
@@ -52,6 +64,7 @@ class Settings(BaseSettings):
     embedding_cache_dir: str = Field(default="./data/cache/embeddings", description="Embedding cache directory")
     max_cache_size: int = Field(default=1000, description="Maximum cache entries")
     cache_ttl: int = Field(default=3600, description="Cache TTL in seconds")
+    semantic_cache_threshold: float = Field(default=0.92, description="Cosine similarity needed to reuse a paraphrased query's answer")
 
     # Performance Configuration
     max_workers: int = Field(default=4, description="Maximum worker threads")
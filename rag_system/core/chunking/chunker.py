@@ -1,12 +1,40 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter, Language
 from langchain.text_splitter import MarkdownHeaderTextSplitter
 import hashlib
 import re
+import numpy as np
+from collections import Counter
 import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
+
+try:
+    import memchunk
+    HAS_MEMCHUNK = True
+except ImportError:
+    HAS_MEMCHUNK = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
 from rag_system.core.utils.logger import get_logger
 from rag_system.config.settings import get_settings
 
@@ -14,6 +42,17 @@ settings = get_settings()
 
 logger = get_logger(__name__)
 
+# Document fields that are chunked rather than copied into chunk metadata
+_NON_METADATA_KEYS = frozenset({'content', 'sections'})
+
+# Byte values trimmed from memchunk chunk bounds before decoding
+_ASCII_WHITESPACE = frozenset(b' \t\n\r\x0b\x0c')
+
+# Patterns compiled once at import so the per-document scans run straight in
+# the regex engine instead of going through re's pattern cache on every call
+_CODE_BLOCK_SPLIT_RE = re.compile(r'(```[\s\S]*?```)')
+_API_SECTION_SPLIT_RE = re.compile(r'(### .+?(?=\n###|\n##|\Z))', re.DOTALL)
+
 class DocumentChunker:
     def __init__(
         self,
@@ -24,6 +63,8 @@ class DocumentChunker:
         self.chunk_size = chunk_size or settings.chunk_size
         self.chunk_overlap = chunk_overlap or settings.chunk_overlap
         self.preserve_code_blocks = preserve_code_blocks
+        # Window step for the memchunk scan, fixed once size/overlap are known
+        self._split_step = max(1, self.chunk_size - self.chunk_overlap)
         
         logger.info(f"Initialized DocumentChunker: size={self.chunk_size}, overlap={self.chunk_overlap}")
         
@@ -48,47 +89,122 @@ class DocumentChunker:
             ("###", "Header 3"),
         ]
         return MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
+
+    def _split_text(self, text: str) -> List[str]:
+        """
+        Split plain text into overlapping chunks on sentence/line boundaries.
+
+        Uses memchunk's SIMD delimiter scan when installed and falls back to
+        the LangChain recursive splitter otherwise.
+        """
+        # Text that already fits needs no scan, encode or decode, whichever
+        # splitter would otherwise run
+        if len(text) <= self.chunk_size:
+            return [] if not text or text.isspace() else [text]
+
+        if not HAS_MEMCHUNK:
+            return self.text_splitter.split_text(text)
+
+        data = text.encode('utf-8')
+        offsets = memchunk.chunk_offsets(data, size=self._split_step, delimiters=b".!?\n")
+
+        # Slice through a memoryview so each chunk is decoded straight out of
+        # the single encoded buffer instead of first copying it to new bytes
+        view = memoryview(data)
+        find = data.find
+        overlap = self.chunk_overlap
+        chunks = []
+        for start, end in offsets:
+            # Reach back into the previous window for overlap, snapping to a word start
+            window_start = start - overlap if start > overlap else 0
+            if window_start:
+                space = find(b' ', window_start, start)
+                if space != -1:
+                    window_start = space + 1
+            # Trim whitespace by moving the bounds, so the decoded chunk is
+            # already clean and the later strip() returns it without copying
+            while window_start < end and data[window_start] in _ASCII_WHITESPACE:
+                window_start += 1
+            while end > window_start and data[end - 1] in _ASCII_WHITESPACE:
+                end -= 1
+            if window_start < end:
+                chunks.append(str(view[window_start:end], 'utf-8', 'ignore'))
+        return chunks
         
-    def chunk_documents_from_files(self) -> List[Dict]:
-        """Load documents from files and chunk them"""
-        logger.info("📚 Loading documents from files...")
+    def chunk_documents_from_files(self, skip_unchanged: bool = False) -> List[Dict]:
+        """
+        Load documents from files and chunk them
 
-        documents = []
+        Args:
+            skip_unchanged: Skip files whose mtime and size match the previous
+                run recorded in the ingest cache, so re-running ingestion on
+                unchanged data does no work. Callers should only pass True
+                when they store the returned chunks.
+        """
+        logger.info("📚 Loading documents from files...")
 
         # Use upload directory to look for processed documents
         raw_data_dir = Path(settings.upload_dir).parent / "raw"
 
-        # Load LangChain docs if they exist
-        langchain_file = raw_data_dir / "langchain" / "langchain_docs.json"
-        if langchain_file.exists():
-            with open(langchain_file, 'r', encoding='utf-8') as f:
-                langchain_docs = json.load(f)
-                documents.extend(langchain_docs)
-                logger.info(f"📄 Loaded {len(langchain_docs)} LangChain documents")
-
-        # Load FastAPI docs if they exist
-        fastapi_file = raw_data_dir / "fastapi" / "fastapi_docs.json"
-        if fastapi_file.exists():
-            with open(fastapi_file, 'r', encoding='utf-8') as f:
-                fastapi_docs = json.load(f)
-                documents.extend(fastapi_docs)
-                logger.info(f"📄 Loaded {len(fastapi_docs)} FastAPI documents")
-
-        if not documents:
+        source_files = {
+            "LangChain": raw_data_dir / "langchain" / "langchain_docs.json",
+            "FastAPI": raw_data_dir / "fastapi" / "fastapi_docs.json",
+        }
+        source_files = {name: path for name, path in source_files.items() if path.exists()}
+
+        if not source_files:
             logger.warning("⚠️ No documents found in raw data directory. This method expects pre-scraped JSON files.")
             return []
 
-        logger.info(f"📚 Total documents loaded: {len(documents)}")
+        ingest_cache = _load_ingest_cache() if skip_unchanged else {}
+        signatures = {name: _file_signature(path) for name, path in source_files.items()}
+        if skip_unchanged:
+            for name, path in list(source_files.items()):
+                if ingest_cache.get(str(path)) == signatures[name]:
+                    logger.info(f"⏭️ Skipping unchanged {name} documents")
+                    del source_files[name]
+            if not source_files:
+                return []
+
+        # Ask the kernel to start reading every file now, so disk I/O for all
+        # of them overlaps instead of each worker blocking on its own reads
+        for path in source_files.values():
+            _prefetch_file(path)
 
-        # Chunk all documents
-        return self.chunk_documents(documents)
+        # Files are independent, so parse and chunk each one in its own process
+        all_chunks = []
+        max_workers = min(len(source_files), settings.max_workers)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                name: executor.submit(_load_and_chunk_file, str(path), self.chunk_size, self.chunk_overlap)
+                for name, path in source_files.items()
+            }
+            for name, future in futures.items():
+                try:
+                    doc_count, chunks = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to load {name} documents: {e}")
+                    continue
+                all_chunks.extend(chunks)
+                ingest_cache[str(source_files[name])] = signatures[name]
+                logger.info(f"📄 Loaded {doc_count} {name} documents ({len(chunks)} chunks)")
+
+        if skip_unchanged:
+            _save_ingest_cache(ingest_cache)
+
+        logger.info(f"📚 Total chunks created: {len(all_chunks)}")
+        return all_chunks
         
     def chunk_documents(self, documents: List[Dict]) -> List[Dict]:
         """Chunk a list of documents with parallel processing"""
+        unique = list(_iter_unique_documents(documents))
+        if len(unique) < len(documents):
+            logger.info(f"Skipping {len(documents) - len(unique)} duplicate documents")
+        documents = unique
         logger.info(f"🔪 Starting to chunk {len(documents)} documents...")
 
         # Use async processing for better performance
-        return asyncio.run(self._chunk_documents_async(documents))
+        return _dedupe_chunks(asyncio.run(self._chunk_documents_async(documents)))
 
     async def _chunk_documents_async(self, documents: List[Dict]) -> List[Dict]:
         """Async document chunking for better performance"""
@@ -137,13 +253,8 @@ class DocumentChunker:
             logger.warning(f"⚠️ Empty content for document: {document.get('title', 'Unknown')}")
             return []
             
-        metadata = document.copy()
-        
-        # Remove content from metadata to avoid duplication
-        if 'content' in metadata:
-            del metadata['content']
-        if 'sections' in metadata:
-            del metadata['sections']
+        # Base metadata built once per document, without content to avoid duplication
+        metadata = {k: v for k, v in document.items() if k not in _NON_METADATA_KEYS}
         
         # Detect document type and chunk accordingly
         doc_type = metadata.get('doc_type', 'unknown')
@@ -170,21 +281,23 @@ class DocumentChunker:
         chunks = []
         
         # Split by code blocks first to preserve them
-        code_block_pattern = r'```[\s\S]*?```'
-        parts = re.split(f'({code_block_pattern})', content)
+        parts = _CODE_BLOCK_SPLIT_RE.split(content)
         
-        current_text = ""
+        # Accumulate text parts in a list and join once, rather than
+        # re-copying the growing string on every '+='
+        text_parts = []
         chunk_counter = 0
         
         for part in parts:
             if part.startswith('```'):
                 # This is a code block
-                if current_text.strip():
+                current_text = ''.join(text_parts)
+                text_parts.clear()
+                if current_text and not current_text.isspace():
                     # Process accumulated text first
                     text_chunks = self._create_text_chunks(current_text, metadata, chunk_counter)
                     chunks.extend(text_chunks)
                     chunk_counter += len(text_chunks)
-                    current_text = ""
                 
                 # Handle code block
                 if len(part) <= self.chunk_size:
@@ -193,7 +306,7 @@ class DocumentChunker:
                         content=part,
                         metadata=metadata,
                         chunk_type='code',
-                        chunk_id=self._generate_chunk_id(part + str(chunk_counter))
+                        chunk_id=self._generate_chunk_id(part, chunk_counter)
                     ))
                     chunk_counter += 1
                 else:
@@ -204,15 +317,16 @@ class DocumentChunker:
                             content=code_chunk,
                             metadata=metadata,
                             chunk_type='code',
-                            chunk_id=self._generate_chunk_id(code_chunk + str(chunk_counter))
+                            chunk_id=self._generate_chunk_id(code_chunk, chunk_counter)
                         ))
                         chunk_counter += 1
             else:
                 # This is text content
-                current_text += part
+                text_parts.append(part)
         
         # Process any remaining text
-        if current_text.strip():
+        current_text = ''.join(text_parts)
+        if current_text and not current_text.isspace():
             text_chunks = self._create_text_chunks(current_text, metadata, chunk_counter)
             chunks.extend(text_chunks)
             
@@ -224,29 +338,28 @@ class DocumentChunker:
         
         # Try to split by function/endpoint definitions
         # Look for patterns like "### functionName" or "## GET /endpoint"
-        section_pattern = r'(### .+?(?=\n###|\n##|\Z))'
-        sections = re.split(section_pattern, content, flags=re.DOTALL)
+        sections = _API_SECTION_SPLIT_RE.split(content)
         
         chunk_counter = 0
         for section in sections:
-            if section.strip():
+            if section and not section.isspace():
                 if len(section) <= self.chunk_size:
                     chunks.append(self._create_chunk(
                         content=section,
                         metadata=metadata,
                         chunk_type='api_reference',
-                        chunk_id=self._generate_chunk_id(section + str(chunk_counter))
+                        chunk_id=self._generate_chunk_id(section, chunk_counter)
                     ))
                     chunk_counter += 1
                 else:
                     # Section too large, split it
-                    sub_chunks = self.text_splitter.split_text(section)
+                    sub_chunks = self._split_text(section)
                     for sub_chunk in sub_chunks:
                         chunks.append(self._create_chunk(
                             content=sub_chunk,
                             metadata=metadata,
                             chunk_type='api_reference',
-                            chunk_id=self._generate_chunk_id(sub_chunk + str(chunk_counter))
+                            chunk_id=self._generate_chunk_id(sub_chunk, chunk_counter)
                         ))
                         chunk_counter += 1
                         
@@ -254,7 +367,7 @@ class DocumentChunker:
         
     def _chunk_text_content(self, content: str, metadata: Dict) -> List[Dict]:
         """Chunk pure text content"""
-        text_chunks = self.text_splitter.split_text(content)
+        text_chunks = self._split_text(content)
         
         chunks = []
         for i, chunk_text in enumerate(text_chunks):
@@ -262,17 +375,17 @@ class DocumentChunker:
                 content=chunk_text,
                 metadata=metadata,
                 chunk_type='text',
-                chunk_id=self._generate_chunk_id(chunk_text + str(i))
+                chunk_id=self._generate_chunk_id(chunk_text, i)
             ))
             
         return chunks
     
     def _create_text_chunks(self, text: str, metadata: Dict, start_counter: int) -> List[Dict]:
         """Helper to create text chunks"""
-        if not text.strip():
+        if not text or text.isspace():
             return []
             
-        text_chunks = self.text_splitter.split_text(text)
+        text_chunks = self._split_text(text)
         chunks = []
         
         for i, chunk_text in enumerate(text_chunks):
@@ -280,29 +393,42 @@ class DocumentChunker:
                 content=chunk_text,
                 metadata=metadata,
                 chunk_type='text',
-                chunk_id=self._generate_chunk_id(chunk_text + str(start_counter + i))
+                chunk_id=self._generate_chunk_id(chunk_text, start_counter + i)
             ))
             
         return chunks
     
     def _create_chunk(self, content: str, metadata: Dict, chunk_type: str, chunk_id: str) -> Dict:
         """Create a standardized chunk object"""
-        chunk_metadata = metadata.copy()
-        chunk_metadata.update({
+        # Document-level metadata is shared; only the per-chunk keys differ
+        chunk_metadata = {
+            **metadata,
             'chunk_type': chunk_type,
             'chunk_id': chunk_id,
             'chunk_size': len(content),
             'word_count': len(content.split())
-        })
+        }
         
         return {
             'content': content.strip(),
             'metadata': chunk_metadata
         }
         
-    def _generate_chunk_id(self, content: str) -> str:
-        """Generate unique ID for chunk"""
-        return hashlib.md5(content.encode()).hexdigest()[:16]
+    def _generate_chunk_id(self, content: str, position: int) -> str:
+        """
+        Generate unique ID for chunk from its content and position.
+
+        The position is fed to the hash separately (as the xxh3 seed) so the
+        chunk text is not copied into a concatenated temporary just to be
+        hashed. IDs are not security-sensitive, so a non-cryptographic hash
+        is enough.
+        """
+        data = content.encode('utf-8', 'ignore')
+        if HAS_XXHASH:
+            return xxhash.xxh3_64_hexdigest(data, seed=position)
+        digest = hashlib.blake2b(data, digest_size=8)
+        digest.update(str(position).encode())
+        return digest.hexdigest()
     
     def save_chunks(self, chunks: List[Dict], filename: str = "chunks.json"):
         """Save chunks to file"""
@@ -325,34 +451,143 @@ class DocumentChunker:
         return output_file
         
     def _calculate_chunk_stats(self, chunks: List[Dict]) -> Dict:
-        """Calculate statistics about chunks"""
+        """
+        Calculate statistics about chunks.
+
+        Computed in one pass from local counters over the chunks in hand;
+        never query the vector store for these, since ingestion may call
+        this per file and a collection scan per call would dominate.
+        """
         if not chunks:
             return {}
-            
-        chunk_sizes = [len(chunk['content']) for chunk in chunks]
-        word_counts = [chunk['metadata'].get('word_count', 0) for chunk in chunks]
-        
-        # Count by type
-        type_counts = {}
-        source_counts = {}
-        
+
+        total_size = total_words = 0
+        max_size, min_size = 0, float('inf')
+        type_counts = Counter()
+        source_counts = Counter()
+
         for chunk in chunks:
-            chunk_type = chunk['metadata'].get('chunk_type', 'unknown')
-            source = chunk['metadata'].get('source', 'unknown')
-            
-            type_counts[chunk_type] = type_counts.get(chunk_type, 0) + 1
-            source_counts[source] = source_counts.get(source, 0) + 1
-        
+            size = len(chunk['content'])
+            total_size += size
+            if size > max_size:
+                max_size = size
+            if size < min_size:
+                min_size = size
+
+            metadata = chunk['metadata']
+            total_words += metadata.get('word_count', 0)
+            type_counts[metadata.get('chunk_type', 'unknown')] += 1
+            source_counts[metadata.get('source', 'unknown')] += 1
+
         return {
             'total_chunks': len(chunks),
-            'avg_chunk_size': sum(chunk_sizes) / len(chunk_sizes),
-            'max_chunk_size': max(chunk_sizes),
-            'min_chunk_size': min(chunk_sizes),
-            'avg_word_count': sum(word_counts) / len(word_counts),
-            'chunk_types': type_counts,
-            'sources': source_counts
+            'avg_chunk_size': total_size / len(chunks),
+            'max_chunk_size': max_size,
+            'min_chunk_size': min_size,
+            'avg_word_count': total_words / len(chunks),
+            'chunk_types': dict(type_counts),
+            'sources': dict(source_counts)
         }
 
+def _prefetch_file(path: Path) -> None:
+    """Hint the OS to read a file into the page cache ahead of use (POSIX only)"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _ingest_cache_path() -> Path:
+    return Path(settings.cache_dir) / "ingest_cache.json"
+
+def _file_signature(path: Path) -> List[int]:
+    """(mtime_ns, size) of a file, as a list so it round-trips through JSON"""
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+def _load_ingest_cache() -> Dict[str, List[int]]:
+    """Load the file path -> signature map recorded by the last ingestion run"""
+    try:
+        return json.loads(_ingest_cache_path().read_text())
+    except (OSError, ValueError):
+        return {}
+
+def _save_ingest_cache(cache: Dict[str, List[int]]) -> None:
+    try:
+        path = _ingest_cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(cache))
+    except OSError as e:
+        logger.warning(f"Could not save ingest cache: {e}")
+
+def _content_hash(content: str) -> int:
+    """Fast 64-bit content fingerprint (xxh3 when installed, blake2b otherwise)"""
+    data = content.encode('utf-8', 'ignore')
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+def _iter_unique_documents(documents: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Yield documents, skipping any whose (source, content) was already seen.
+
+    Duplicate pages are common in scraped docs; dropping them here saves
+    all of the chunking and embedding work they would otherwise cost.
+    """
+    seen = set()
+    for document in documents:
+        key = (document.get('source'), _content_hash(document.get('content') or ''))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield document
+
+def _dedupe_chunks(chunks: List[Dict]) -> List[Dict]:
+    """
+    Drop chunks whose content repeats an earlier chunk, keeping first occurrences.
+
+    Hashes go into a uint64 array so np.unique does the comparison in C,
+    rather than a Python set hashing every full chunk string.
+    """
+    if len(chunks) < 2:
+        return chunks
+    hashes = np.fromiter((_content_hash(c['content']) for c in chunks), dtype=np.uint64, count=len(chunks))
+    _, keep = np.unique(hashes, return_index=True)
+    if len(keep) == len(chunks):
+        return chunks
+    keep.sort()
+    return [chunks[i] for i in keep]
+
+def _iter_json_documents(file_path: str) -> Iterator[Dict]:
+    """
+    Yield documents from a JSON array file one at a time.
+
+    Streams with ijson when installed so the full document list never sits in
+    memory; otherwise parses the whole file at once.
+    """
+    with open(file_path, 'rb') as f:
+        if HAS_IJSON:
+            yield from ijson.items(f, 'item', use_float=True)
+            return
+        raw = f.read()
+    yield from (orjson.loads(raw) if HAS_ORJSON else json.loads(raw))
+
+def _load_and_chunk_file(file_path: str, chunk_size: int, chunk_overlap: int) -> Tuple[int, List[Dict]]:
+    """Process pool worker: parse one pre-scraped JSON file and chunk its documents"""
+    chunker = DocumentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    doc_count = 0
+    for doc_count, document in enumerate(_iter_unique_documents(_iter_json_documents(file_path)), start=1):
+        chunks.extend(chunker._chunk_document_safe(document, doc_count))
+    return doc_count, _dedupe_chunks(chunks)
+
 # Test function
 def test_chunker():
     """Test the chunker with existing documents"""
@@ -17,6 +17,11 @@ MEDIUM_BATCH_SIZE = 500
 LARGE_BATCH_SIZE = 2000
 XLARGE_BATCH_SIZE = 5000
 
+# Chunks queued before flushing to the vector store during ingestion
+INGEST_BATCH_SIZE = 256
+# Batches allowed to wait for the background writer before chunking blocks
+INGEST_QUEUE_SIZE = 32
+
 # ChromaDB limits - found these through trial and error
 CHROMADB_DOCUMENT_LIMIT = 10000
 CHROMADB_RETRY_ATTEMPTS = 3  # usually succeeds on 2nd try
@@ -41,6 +46,14 @@ MAX_CONTEXT_RESULTS = 3  # more than this and LLM gets confused
 CONTEXT_CONTENT_LENGTH = 800
 QUERY_PREVIEW_LENGTH = 50
 
+# Sent as Ollama's system prompt so every request shares the same leading
+# tokens and the server can reuse their KV cache
+OLLAMA_SYSTEM_PROMPT = (
+    "You are DocuMentor, a developer documentation assistant. Answer using "
+    "the provided document context; if it doesn't cover the question, say so "
+    "and give general guidance."
+)
+
 # ============================================
 # Caching Constants
 # ============================================
@@ -48,9 +61,22 @@ DEFAULT_CACHE_SIZE = 1000
 MIN_RESPONSE_LENGTH_TO_CACHE = 10
 CACHE_SAVE_INTERVAL = 10  # Save every N entries
 DEFAULT_CACHE_TTL = 3600  # seconds
+# Collection stats are polled by dashboards and health probes; uploads
+# clear the cache, so the TTL only bounds drift from out-of-band writes
+STATS_CACHE_TTL = 30  # seconds
 
 # Embedding cache
 MAX_EMBEDDING_CACHE_SIZE = 10000
+# Recent query embeddings kept in memory so back-to-back endpoints skip the model
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+# Uncached texts per embedding call handed to each worker thread
+EMBEDDING_SHARD_SIZE = 64
+# Formatted search hits per (query, k, filter); writes to the store clear them
+SEARCH_RESULT_CACHE_SIZE = 4096
+SEARCH_RESULT_CACHE_TTL = 300  # seconds
+# Concurrent query embeddings/searches arriving within this window share one call
+SEARCH_BATCH_WINDOW = 0.005  # seconds
+SEARCH_BATCH_MAX_SIZE = 32
 
 # ============================================
 # Chunking Constants
@@ -67,6 +93,10 @@ DEFAULT_WORKER_THREADS = 4
 # ============================================
 MAX_FILE_SIZE_MB = 50
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+# Leading bytes handed to libmagic; it needs at least 2 KB, not the whole file
+MIME_SNIFF_BYTES = 8192
+# Room for multipart boundaries and form fields around an upload's bytes
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
 
 # Supported file extensions
 SUPPORTED_TEXT_EXTENSIONS = ['.txt', '.md', '.markdown']
@@ -88,6 +118,12 @@ ALL_SUPPORTED_EXTENSIONS = (
 # ============================================
 DEFAULT_API_TIMEOUT = 30  # seconds
 OLLAMA_TIMEOUT = 120  # ollama can be slow sometimes, give it time
+# Only refused connections (e.g. Ollama restarting) are retried; a timed-out
+# generation would just time out again
+OLLAMA_RETRY_ATTEMPTS = 3
+OLLAMA_RETRY_DELAY = 0.5  # seconds, doubled per attempt
+# A successful availability check is trusted this long before Ollama is asked again
+OLLAMA_AVAILABILITY_TTL = 30  # seconds
 HEALTH_CHECK_TIMEOUT = 2  # seconds
 HEALTH_CHECK_MAX_RETRIES = 30  # might be overkill but better safe than sorry
 
@@ -98,6 +134,18 @@ RATE_LIMIT_UPLOAD = 10  # uploads are expensive
 RATE_LIMIT_QUERY = 30
 RATE_LIMIT_GENERATION = 20  # LLM calls cost money!
 
+# Worker threads for sync endpoints (anyio defaults to 40); most of their
+# time is spent waiting on the LLM or ChromaDB, not holding the GIL
+API_THREADPOOL_SIZE = 128
+# Of those, how many may be blocked in LLM generation at once
+LLM_THREAD_LIMIT = 32
+# ...and how many may be waiting on a web search
+WEB_SEARCH_THREAD_LIMIT = 16
+
+# Response compression; smaller bodies aren't worth the CPU
+GZIP_MINIMUM_SIZE = 1024  # bytes
+GZIP_COMPRESS_LEVEL = 5
+
 # ============================================
 # Web Search Constants
 # ============================================
@@ -4,6 +4,8 @@ Supports Ollama, OpenAI, and Google Gemini
 """
 
 import os
+import json
+import time
 from typing import List, Dict, Optional, Generator
 from abc import ABC, abstractmethod
 
@@ -25,12 +27,52 @@ try:
 except ImportError:
     HAS_REQUESTS = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from rag_system.core.utils.logger import get_logger
 from rag_system.config.settings import get_settings
+from rag_system.core.constants import (
+    OLLAMA_SYSTEM_PROMPT,
+    OLLAMA_RETRY_ATTEMPTS,
+    OLLAMA_RETRY_DELAY,
+    OLLAMA_AVAILABILITY_TTL,
+)
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+
+def _format_context(results: List[Dict], max_chars: int, header: str = "Context from documents:\n") -> str:
+    """
+    Numbered context block for a prompt.
+
+    Built from a list of parts and joined once; growing one string with +=
+    copies the whole context again for every result.
+    """
+    if not results:
+        return ""
+    parts = [header]
+    for i, result in enumerate(results, 1):
+        content = result.get('content', '')[:max_chars]
+        source = result.get('metadata', {}).get('title', 'Unknown')
+        parts.append(f"\n{i}. From '{source}':\n{content}...\n")
+    return "".join(parts)
+
+
+class LLMErrorMessage(str):
+    """
+    A failure reported in place of generated text.
+
+    Callers that only display the result (e.g. the web UI) see a plain
+    string; the API checks for this type so an outage is never cached as
+    an answer.
+    """
+
+
 class BaseLLMProvider(ABC):
     """Base class for LLM providers"""
 
@@ -44,60 +86,145 @@ class BaseLLMProvider(ABC):
         """Check if the provider is available and configured"""
         pass
 
+    def stream_response(self, prompt: str, context: List[Dict]) -> Generator[str, None, None]:
+        """Yield the response as it is generated; providers without streaming yield it whole"""
+        yield self.generate_response(prompt, context)
+
+    def preload(self) -> bool:
+        """Load the model ahead of the first request; hosted providers have nothing to load"""
+        return False
+
 class OllamaProvider(BaseLLMProvider):
     """Ollama local LLM provider"""
 
     def __init__(self):
         self.base_url = f"http://{settings.ollama_host}"
         self.model = settings.ollama_model
+        # Until this monotonic time Ollama counts as available without a
+        # /api/tags round trip; every answer checks availability first
+        self._available_until = 0.0
+
+    def _build_payload(self, prompt: str, context: List[Dict], stream: bool) -> Dict:
+        """Generate request for a question and its retrieved context"""
+        # Build context from search results. The top hits are listed in a
+        # canonical order, so questions that retrieve the same chunks send
+        # an identical prompt prefix and Ollama can reuse its KV cache
+        top_results = sorted(context[:3], key=lambda r: r.get('metadata', {}).get('chunk_id') or r.get('content', ''))
+        context_text = _format_context(top_results, 500, header="\n\nContext from documents:\n")
+
+        full_prompt = f"{context_text}\n\nQuestion: {prompt}\n\nAnswer based on the context above:"
+
+        return {
+            "model": self.model,
+            "system": OLLAMA_SYSTEM_PROMPT,
+            "prompt": full_prompt,
+            "stream": stream,
+            "keep_alive": settings.ollama_keep_alive
+        }
+
+    def _post_generate(self, payload: Dict, **kwargs):
+        """
+        POST to /api/generate, retrying refused connections.
+
+        This runs on a worker thread, so backing off here never blocks the
+        event loop. Other errors (timeouts, bad requests) aren't retried and
+        propagate to the caller.
+        """
+        for attempt in range(OLLAMA_RETRY_ATTEMPTS):
+            try:
+                return requests.post(
+                    f"{self.base_url}/api/generate",
+                    json=payload,
+                    timeout=settings.ollama_timeout,
+                    **kwargs
+                )
+            except requests.ConnectionError:
+                if attempt == OLLAMA_RETRY_ATTEMPTS - 1:
+                    self._available_until = 0.0
+                    raise
+                time.sleep(OLLAMA_RETRY_DELAY * (2 ** attempt))
 
     def generate_response(self, prompt: str, context: List[Dict]) -> str:
         """Generate response using Ollama"""
         if not HAS_REQUESTS:
-            return "Error: requests library not available"
+            return LLMErrorMessage("Error: requests library not available")
 
         try:
-            # Build context from search results
-            context_text = ""
-            if context:
-                context_text = "\n\nContext from documents:\n"
-                for i, result in enumerate(context[:3], 1):
-                    content = result.get('content', '')[:500]
-                    source = result.get('metadata', {}).get('title', 'Unknown')
-                    context_text += f"\n{i}. From '{source}':\n{content}...\n"
-
-            full_prompt = f"{context_text}\n\nQuestion: {prompt}\n\nAnswer based on the context above:"
-
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": full_prompt,
-                    "stream": False
-                },
-                timeout=settings.ollama_timeout
-            )
+            response = self._post_generate(self._build_payload(prompt, context, stream=False))
 
             if response.status_code == 200:
                 return response.json().get('response', 'No response generated')
             else:
-                return f"Error: Ollama request failed with status {response.status_code}"
+                return LLMErrorMessage(f"Error: Ollama request failed with status {response.status_code}")
 
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
-            return f"Error generating response: {e}"
+            return LLMErrorMessage(f"Error generating response: {e}")
+
+    def stream_response(self, prompt: str, context: List[Dict]) -> Generator[str, None, None]:
+        """Yield response tokens as Ollama produces them"""
+        if not HAS_REQUESTS:
+            yield LLMErrorMessage("Error: requests library not available")
+            return
+
+        try:
+            # Ollama sends one JSON object per line, each carrying the next
+            # piece of the answer, until one marked done
+            response = self._post_generate(self._build_payload(prompt, context, stream=True), stream=True)
+            with response:
+                if response.status_code != 200:
+                    yield LLMErrorMessage(f"Error: Ollama request failed with status {response.status_code}")
+                    return
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    # Parsed once per token, so in orjson when available
+                    chunk = orjson.loads(line) if HAS_ORJSON else json.loads(line)
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+
+        except Exception as e:
+            logger.error(f"Ollama streaming failed: {e}")
+            yield LLMErrorMessage(f"Error generating response: {e}")
+
+    def preload(self) -> bool:
+        """Load the model into memory without generating anything"""
+        if not HAS_REQUESTS:
+            return False
+
+        try:
+            # A generate request without a prompt only loads the model
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": settings.ollama_keep_alive},
+                timeout=settings.ollama_timeout
+            )
+            return response.status_code == 200
+        except requests.RequestException as e:
+            logger.warning(f"Ollama model preload failed: {e}")
+            return False
 
     def is_available(self) -> bool:
         """Check if Ollama is available"""
         if not HAS_REQUESTS:
             return False
 
+        if time.monotonic() < self._available_until:
+            return True
+
         try:
             response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
         except (requests.RequestException, ConnectionError, TimeoutError):
             return False
 
+        # Only success is remembered, so a down server is re-checked each time
+        if response.status_code == 200:
+            self._available_until = time.monotonic() + OLLAMA_AVAILABILITY_TTL
+            return True
+        return False
+
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI GPT provider"""
 
@@ -111,20 +238,14 @@ class OpenAIProvider(BaseLLMProvider):
     def generate_response(self, prompt: str, context: List[Dict]) -> str:
         """Generate response using OpenAI"""
         if not HAS_OPENAI:
-            return "Error: OpenAI library not available"
+            return LLMErrorMessage("Error: OpenAI library not available")
 
         if not self.client:
-            return "Error: OpenAI API key not configured"
+            return LLMErrorMessage("Error: OpenAI API key not configured")
 
         try:
             # Build context from search results
-            context_text = ""
-            if context:
-                context_text = "Context from documents:\n"
-                for i, result in enumerate(context[:3], 1):
-                    content = result.get('content', '')[:800]
-                    source = result.get('metadata', {}).get('title', 'Unknown')
-                    context_text += f"\n{i}. From '{source}':\n{content}...\n"
+            context_text = _format_context(context[:3], 800)
 
             messages = [
                 {
@@ -149,7 +270,7 @@ class OpenAIProvider(BaseLLMProvider):
 
         except Exception as e:
             logger.error(f"OpenAI generation failed: {e}")
-            return f"Error generating response with OpenAI: {e}"
+            return LLMErrorMessage(f"Error generating response with OpenAI: {e}")
 
     def is_available(self) -> bool:
         """Check if OpenAI is available"""
@@ -167,20 +288,14 @@ class GeminiProvider(BaseLLMProvider):
     def generate_response(self, prompt: str, context: List[Dict]) -> str:
         """Generate response using Gemini"""
         if not HAS_GEMINI:
-            return "Error: Google Generative AI library not available"
+            return LLMErrorMessage("Error: Google Generative AI library not available")
 
         if not self.api_key:
-            return "Error: Gemini API key not configured"
+            return LLMErrorMessage("Error: Gemini API key not configured")
 
         try:
             # Build context from search results
-            context_text = ""
-            if context:
-                context_text = "Context from documents:\n"
-                for i, result in enumerate(context[:3], 1):
-                    content = result.get('content', '')[:800]
-                    source = result.get('metadata', {}).get('title', 'Unknown')
-                    context_text += f"\n{i}. From '{source}':\n{content}...\n"
+            context_text = _format_context(context[:3], 800)
 
             full_prompt = f"""Based on the following context, please answer the question. If the context doesn't contain relevant information, provide general guidance.
 
@@ -195,7 +310,7 @@ Answer:"""
 
         except Exception as e:
             logger.error(f"Gemini generation failed: {e}")
-            return f"Error generating response with Gemini: {e}"
+            return LLMErrorMessage(f"Error generating response with Gemini: {e}")
 
     def is_available(self) -> bool:
         """Check if Gemini is available"""
@@ -273,25 +388,45 @@ class LLMService(CodeGenerationMixin):
         """Get list of available providers"""
         return [name for name, p in self.providers.items() if p.is_available()]
 
-    def generate_answer(self, question: str, search_results: List[Dict]) -> str:
-        """Generate answer using the current provider"""
+    def _active_provider(self) -> Optional[BaseLLMProvider]:
+        """Current provider, falling back to the first available one"""
         provider = self.providers.get(self.current_provider)
 
         if not provider or not provider.is_available():
             # Fallback
             available = self.get_available_providers()
             if not available:
-                return "Error: No LLM providers are available"
+                return None
             self.current_provider = available[0]
             provider = self.providers[self.current_provider]
             logger.warning(f"Using fallback provider: {self.current_provider}")
 
+        return provider
+
+    def generate_answer(self, question: str, search_results: List[Dict]) -> str:
+        """Generate answer using the current provider"""
+        provider = self._active_provider()
+        if provider is None:
+            return LLMErrorMessage("Error: No LLM providers are available")
         return provider.generate_response(question, search_results)
 
+    def stream_answer(self, question: str, search_results: List[Dict]) -> Generator[str, None, None]:
+        """Yield the answer in pieces as the current provider generates it"""
+        provider = self._active_provider()
+        if provider is None:
+            yield LLMErrorMessage("Error: No LLM providers are available")
+            return
+        yield from provider.stream_response(question, search_results)
+
     def generate_response(self, prompt: str, context: List[Dict]) -> str:
         """Generate response (wrapper)"""
         return self.generate_answer(prompt, context)
 
+    def preload(self) -> bool:
+        """Load the current provider's model so the first request doesn't pay for it"""
+        provider = self.providers.get(self.current_provider)
+        return provider.preload() if provider else False
+
     def get_provider_status(self) -> Dict[str, bool]:
         """Get status of all providers"""
         return {name: p.is_available() for name, p in self.providers.items()}
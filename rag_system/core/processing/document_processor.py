@@ -5,7 +5,8 @@ Supports PDF, Word, PowerPoint, Excel, and text files
 
 import os
 import io
-from typing import Dict, List, Optional, Union
+import re
+from typing import BinaryIO, Dict, List, Optional, Union
 from pathlib import Path
 import zipfile
 import xml.etree.ElementTree as ET
@@ -28,6 +29,13 @@ try:
 except ImportError:
     HAS_PANDAS = False
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
 try:
     from pptx import Presentation
     HAS_PPTX = True
@@ -38,6 +46,58 @@ from rag_system.core.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Rows parsed per pandas batch when summarizing CSV files
+CSV_READ_CHUNK_ROWS = 10_000
+# Bytes per record batch when pyarrow streams a CSV
+CSV_ARROW_BLOCK_SIZE = 1 << 20
+
+# RTF control words (e.g. \par, \fs24) and group braces, stripped from RTF text
+_RTF_COMMAND_RE = re.compile(r'\\[a-z]+\d*\s?')
+_RTF_BRACE_RE = re.compile(r'[{}]')
+
+# Raw bytes or a readable binary stream (e.g. a spooled upload)
+FileContent = Union[bytes, BinaryIO]
+
+
+def _as_file(source: FileContent) -> BinaryIO:
+    """Wrap raw bytes in a file object; streams are passed through uncopied"""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _as_bytes(source: FileContent) -> bytes:
+    """Raw bytes of the content, reading streams once"""
+    return source if isinstance(source, (bytes, bytearray)) else source.read()
+
+
+class _BorrowedStream:
+    """
+    File-like view of a caller's stream that a reader can close without
+    closing the stream itself, so it can be rewound and read again.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.closed = False
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._stream.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._stream.seekable()
+
+    def close(self):
+        self.closed = True
+
+
 class EnhancedDocumentProcessor:
     """Process various document formats into text"""
 
@@ -45,6 +105,7 @@ class EnhancedDocumentProcessor:
         self.supported_formats = {
             '.txt': self._process_text,
             '.md': self._process_text,
+            '.markdown': self._process_text,
             '.pdf': self._process_pdf,
             '.docx': self._process_docx,
             '.doc': self._process_doc_fallback,
@@ -58,13 +119,15 @@ class EnhancedDocumentProcessor:
 
         logger.info(f"Enhanced Document Processor initialized with {len(self.supported_formats)} supported formats")
 
-    def process_file(self, file_path: Union[str, Path], file_content: Optional[bytes] = None) -> Dict:
+    def process_file(self, file_path: Union[str, Path], file_content: Optional[FileContent] = None) -> Dict:
         """
         Process a file and extract text content
 
         Args:
             file_path: Path to the file or filename
-            file_content: Optional byte content of the file
+            file_content: Optional content of the file, as bytes or a binary
+                stream positioned at the start (streams avoid copying large
+                uploads into memory)
 
         Returns:
             Dictionary with extracted content and metadata
@@ -113,6 +176,8 @@ class EnhancedDocumentProcessor:
 
     def _process_text(self, source: Union[Path, bytes], is_bytes: bool = False) -> Dict:
         """Process plain text files"""
+        if is_bytes:
+            source = _as_bytes(source)
         try:
             if is_bytes:
                 content = source.decode('utf-8')
@@ -150,7 +215,7 @@ class EnhancedDocumentProcessor:
 
         try:
             if is_bytes:
-                pdf_file = io.BytesIO(source)
+                pdf_file = _as_file(source)
                 reader = pypdf.PdfReader(pdf_file)
                 content = []
 
@@ -197,7 +262,7 @@ class EnhancedDocumentProcessor:
 
         try:
             if is_bytes:
-                doc = DocxDocument(io.BytesIO(source))
+                doc = DocxDocument(_as_file(source))
             else:
                 doc = DocxDocument(source)
 
@@ -247,15 +312,14 @@ class EnhancedDocumentProcessor:
         """Basic RTF processing"""
         try:
             if is_bytes:
-                content = source.decode('utf-8')
+                content = _as_bytes(source).decode('utf-8')
             else:
                 with open(source, 'r', encoding='utf-8') as f:
                     content = f.read()
 
             # Basic RTF cleaning (remove basic RTF tags)
-            import re
-            content = re.sub(r'\\[a-z]+\d*\s?', '', content)  # Remove RTF commands
-            content = re.sub(r'[{}]', '', content)  # Remove braces
+            content = _RTF_COMMAND_RE.sub('', content)  # Remove RTF commands
+            content = _RTF_BRACE_RE.sub('', content)  # Remove braces
             content = content.replace('\\', '')
 
             return {
@@ -280,28 +344,30 @@ class EnhancedDocumentProcessor:
             }
 
         try:
-            if is_bytes:
-                df = pd.read_csv(io.BytesIO(source))
-            else:
-                df = pd.read_csv(source)
+            preview = None
+            if HAS_PYARROW:
+                preview, row_count = self._scan_csv_arrow(source, is_bytes)
+            if preview is None:
+                preview, row_count = self._scan_csv_pandas(source, is_bytes)
+            columns = preview.columns.tolist()
 
             # Convert to readable text format
             content = []
-            content.append(f"CSV Data with {len(df)} rows and {len(df.columns)} columns\n")
-            content.append("Columns: " + ", ".join(df.columns.tolist()))
+            content.append(f"CSV Data with {row_count} rows and {len(columns)} columns\n")
+            content.append("Columns: " + ", ".join(columns))
             content.append("\nData Preview:")
-            content.append(df.head(10).to_string())
+            content.append(preview.to_string())
 
-            if len(df) > 10:
-                content.append(f"\n... and {len(df) - 10} more rows")
+            if row_count > 10:
+                content.append(f"\n... and {row_count - 10} more rows")
 
             return {
                 'content': '\n'.join(content),
                 'metadata': {
                     'format': 'csv',
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'column_names': df.columns.tolist()
+                    'rows': row_count,
+                    'columns': len(columns),
+                    'column_names': columns
                 },
                 'success': True
             }
@@ -313,6 +379,53 @@ class EnhancedDocumentProcessor:
                 'success': False
             }
 
+    def _scan_csv_arrow(self, source: Union[Path, FileContent], is_bytes: bool) -> tuple:
+        """
+        Stream a CSV through pyarrow's multi-threaded reader, returning a
+        10-row pandas preview and the row count.
+
+        Arrow infers column types from the first block, so a file whose later
+        rows contradict them returns (None, 0) and is re-read with pandas from
+        the position the stream started at.
+        """
+        stream = _as_file(source) if is_bytes else source
+        start = stream.tell() if is_bytes else None
+        try:
+            # Arrow reads ahead and may close what it is given; the pandas
+            # fallback needs the caller's stream open and rewound
+            reader = pa_csv.open_csv(
+                _BorrowedStream(stream) if is_bytes else stream,
+                read_options=pa_csv.ReadOptions(block_size=CSV_ARROW_BLOCK_SIZE)
+            )
+            preview = None
+            row_count = 0
+            for batch in reader:
+                if preview is None and batch.num_rows:
+                    preview = batch.slice(0, 10).to_pandas()
+                row_count += batch.num_rows
+            if preview is None:
+                preview = reader.schema.empty_table().to_pandas()
+            return preview, row_count
+        except pa.ArrowInvalid as e:
+            logger.debug(f"pyarrow CSV read failed, falling back to pandas: {e}")
+            if start is not None:
+                stream.seek(start)
+            return None, 0
+
+    def _scan_csv_pandas(self, source: Union[Path, FileContent], is_bytes: bool) -> tuple:
+        """Stream a CSV in pandas row batches, returning a 10-row preview and the row count"""
+        # Only the preview rows and a running count are kept, never the whole DataFrame
+        reader = pd.read_csv(_as_file(source) if is_bytes else source, chunksize=CSV_READ_CHUNK_ROWS)
+        preview = None
+        row_count = 0
+        for batch in reader:
+            if preview is None:
+                preview = batch.head(10)
+            row_count += len(batch)
+        if preview is None:
+            raise ValueError("No columns to parse from file")
+        return preview, row_count
+
     def _process_excel(self, source: Union[Path, bytes], is_bytes: bool = False) -> Dict:
         """Process Excel files"""
         if not HAS_PANDAS:
@@ -324,7 +437,7 @@ class EnhancedDocumentProcessor:
 
         try:
             if is_bytes:
-                excel_file = pd.ExcelFile(io.BytesIO(source))
+                excel_file = pd.ExcelFile(_as_file(source))
             else:
                 excel_file = pd.ExcelFile(source)
 
@@ -374,7 +487,7 @@ class EnhancedDocumentProcessor:
 
         try:
             if is_bytes:
-                prs = Presentation(io.BytesIO(source))
+                prs = Presentation(_as_file(source))
             else:
                 prs = Presentation(source)
 
@@ -409,7 +522,7 @@ class EnhancedDocumentProcessor:
         """Process OpenDocument Text files"""
         try:
             if is_bytes:
-                odt_file = zipfile.ZipFile(io.BytesIO(source))
+                odt_file = zipfile.ZipFile(_as_file(source))
             else:
                 odt_file = zipfile.ZipFile(source)
 
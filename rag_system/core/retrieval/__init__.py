@@ -2,6 +2,7 @@
 Vector Retrieval Module
 """
 
-from .vector_store import ChromaVectorStore as VectorStore
+from .vector_store import ChromaVectorStore as VectorStore, BatchWriter
+from .search_batcher import SearchBatcher
 
-__all__ = ['VectorStore']
\ No newline at end of file
+__all__ = ['VectorStore', 'BatchWriter', 'SearchBatcher']
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Micro-batching for query embedding and vector search.
+
+Concurrent API requests each embed their question and query ChromaDB on
+their own. SearchBatcher collects the calls that arrive within a few
+milliseconds of each other and runs them together: one model forward pass
+for all the embeddings, and one ChromaDB multi-query per (k, filter) group.
+"""
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+import anyio.to_thread
+
+from rag_system.core.utils.logger import get_logger
+from rag_system.core.constants import SEARCH_BATCH_WINDOW, SEARCH_BATCH_MAX_SIZE
+
+logger = get_logger(__name__)
+
+
+class SearchBatcher:
+    """
+    Coalesce concurrent embed_query() and search() calls on a vector store.
+
+    The worker task starts on the first call in a running event loop. While
+    an earlier batch is still running, a new batch waits one window for
+    company; on an idle batcher a call is dispatched at once, so batching
+    only costs latency when there is load to amortize.
+    """
+
+    def __init__(self, vector_store, window: float = SEARCH_BATCH_WINDOW, max_batch: int = SEARCH_BATCH_MAX_SIZE):
+        self.vector_store = vector_store
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatches = set()  # keeps running batch tasks referenced
+        self.batches = 0
+        self.calls = 0
+
+    async def embed(self, query: str) -> List[float]:
+        """Batched vector_store.embed_query()"""
+        return await self._submit(("embed",), query)
+
+    async def search(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None,
+                     query_embedding: Optional[List[float]] = None) -> List[Dict]:
+        """Batched vector_store.search()"""
+        filter_key = json.dumps(filter_dict, sort_keys=True, default=str) if filter_dict else None
+        return await self._submit(("search", k, filter_key), (query, query_embedding, filter_dict))
+
+    async def close(self):
+        """Stop the worker; calls made afterwards start a new one"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _submit(self, group: tuple, item):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((group, item, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self._dispatches:
+                # Under load: give concurrent requests one window to join
+                await asyncio.sleep(self.window)
+            else:
+                # Idle: only pick up calls queued in the same loop iteration
+                await asyncio.sleep(0)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            groups: Dict[tuple, list] = {}
+            for group, item, future in batch:
+                groups.setdefault(group, []).append((item, future))
+
+            # Dispatch without waiting, so a slow search doesn't hold up the
+            # next batch of embeddings
+            for group, entries in groups.items():
+                task = asyncio.ensure_future(self._dispatch(group, entries))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, group: tuple, entries: list):
+        """Run one group as a single vector store call and resolve its futures"""
+        items = [item for item, _ in entries]
+        self.batches += 1
+        self.calls += len(items)
+        try:
+            if group[0] == "embed":
+                results = await anyio.to_thread.run_sync(self.vector_store.embed_queries, items)
+            else:
+                queries = [query for query, _, _ in items]
+                embeddings = [embedding for _, embedding, _ in items]
+                results = await anyio.to_thread.run_sync(
+                    self.vector_store.search_batch, queries, group[1], items[0][2], embeddings
+                )
+        except Exception as e:
+            logger.error(f"Batched {group[0]} of {len(items)} queries failed: {e}")
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(entries, results):
+            # The caller may have been cancelled (e.g. client disconnect)
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """Get batching statistics"""
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "avg_batch_size": self.calls / self.batches if self.batches else 0.0
+        }
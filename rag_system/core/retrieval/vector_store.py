@@ -5,21 +5,78 @@ Handles document storage, retrieval, and similarity search with proper error han
 and retry logic for ChromaDB operations.
 """
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
+from chromadb.errors import NotFoundError
 from chromadb.utils import embedding_functions
+import json
+import os
 import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Thread
+from typing import List, Dict, NamedTuple, Optional
 from filelock import FileLock, Timeout
 from rag_system.core.utils.logger import get_logger
 from rag_system.core.utils.embedding_cache import embedding_cache
+from rag_system.core.utils.cache import TTLCache
 from rag_system.config.settings import get_settings
-from rag_system.core.constants import CHROMADB_RETRY_ATTEMPTS, CHROMADB_RETRY_DELAY, CHROMADB_DOCUMENT_LIMIT
+from rag_system.core.constants import (
+    CHROMADB_RETRY_ATTEMPTS, CHROMADB_RETRY_DELAY, CHROMADB_DOCUMENT_LIMIT, INGEST_QUEUE_SIZE,
+    EMBEDDING_SHARD_SIZE, QUERY_EMBEDDING_CACHE_SIZE, SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL,
+    XLARGE_BATCH_SIZE
+)
 
 settings = get_settings()
 
 logger = get_logger(__name__)
 
+
+def _clean_text(text: str) -> str:
+    """
+    Remove null bytes and unencodable characters (lone surrogates) from text.
+
+    Chunk text arrives here already decoded from UTF-8, so the common case is
+    clean; ASCII strings skip the encode/decode round trip entirely.
+    """
+    text = text.replace('\x00', '')
+    if text.isascii():
+        return text
+    return text.encode('utf-8', 'ignore').decode('utf-8')
+
+
+class SearchHits(NamedTuple):
+    """
+    One query's formatted results as parallel columns.
+
+    This is the form kept in the search result cache: hit dicts are built
+    only when results are handed out, once per caller, so a cache miss no
+    longer formats dicts and then copies them.
+    """
+    contents: List[str]
+    metadatas: List[Dict]
+    scores: np.ndarray
+
+    def to_dicts(self) -> List[Dict]:
+        """Hit dicts in rank order, with metadata copied so callers can't alter the cached ones"""
+        return [
+            {'content': content, 'metadata': dict(metadata), 'score': score}
+            for content, metadata, score in zip(self.contents, self.metadatas, self.scores.tolist())
+        ]
+
+
+_NO_HITS = SearchHits([], [], np.empty(0))
+
+
+def _clean_metadata(metadata: dict) -> dict:
+    """Sanitize metadata for ChromaDB: None becomes "" and strings are cleaned"""
+    return {
+        k: "" if v is None else _clean_text(v) if isinstance(v, str) else v
+        for k, v in metadata.items()
+    }
+
+
 class ChromaVectorStore:
     def __init__(self):
         self.persist_directory = settings.chroma_persist_directory
@@ -30,24 +87,45 @@ class ChromaVectorStore:
         lock_dir.mkdir(parents=True, exist_ok=True)
         self.lock_file_path = lock_dir / f"{self.collection_name}.lock"
         self.lock = FileLock(self.lock_file_path, timeout=10)
+        # Replaced on every write, so other processes (API workers, ingest
+        # runs) can tell their caches are stale from one stat call
+        self.version_file_path = lock_dir / f"{self.collection_name}.version"
 
         logger.debug(f"Using lock file: {self.lock_file_path}")
 
         # Initialize client with proper locking
         with self.lock:
             logger.debug("Acquired lock for ChromaDB initialization")
-            self.client = chromadb.PersistentClient(path=self.persist_directory)
+            # One client (and so one SQLite connection pool) serves every
+            # request; telemetry would otherwise record an event per query
+            self.client = chromadb.PersistentClient(
+                path=self.persist_directory,
+                settings=ChromaSettings(anonymized_telemetry=False)
+            )
 
         # Get optimized embedding function with caching
         try:
+            model_kwargs = {}
+            cache_name = settings.embedding_model
+            if settings.embedding_backend != "torch":
+                # ONNX Runtime / OpenVINO, optionally with int8-quantized
+                # weights, embed queries several times faster on CPU
+                model_kwargs["backend"] = settings.embedding_backend
+                cache_name = f"{cache_name}:{settings.embedding_backend}"
+                if settings.embedding_model_file:
+                    model_kwargs["model_kwargs"] = {"file_name": settings.embedding_model_file}
+                    cache_name = f"{cache_name}:{Path(settings.embedding_model_file).stem}"
             base_embedding = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name="all-MiniLM-L6-v2"
+                model_name=settings.embedding_model,
+                **model_kwargs
             )
+            # Different backends/weights give slightly different vectors, so
+            # each gets its own embedding cache namespace
             self.embedding_function = EmbeddingService(
                 base_embedding,
-                model_name="all-MiniLM-L6-v2"
+                model_name=cache_name
             )
-            logger.info("Using sentence-transformers with caching")
+            logger.info(f"Using sentence-transformers ({settings.embedding_backend}) with caching")
         except Exception as e:
             logger.warning(f"Using default embeddings: {e}")
             base_embedding = embedding_functions.DefaultEmbeddingFunction()
@@ -55,27 +133,81 @@ class ChromaVectorStore:
                 base_embedding,
                 model_name="default"
             )
+
+        # Prepared query text -> embedding, shared by every search endpoint
+        self._query_embeddings = TTLCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE, ttl=settings.cache_ttl)
+        # (prepared query, k, filter) -> formatted hits; cleared on every write
+        self._search_results = TTLCache(maxsize=SEARCH_RESULT_CACHE_SIZE, ttl=SEARCH_RESULT_CACHE_TTL)
+        self._results_version = self.data_version()
         
         # Get or create collection
         try:
             self.collection = self.client.get_collection(
-                name=self.collection_name
+                name=self.collection_name,
+                embedding_function=self.embedding_function
             )
             logger.info(f"Loaded collection: {self.collection.count()} docs")
-        except ValueError:
-            # Collection doesn't exist, create it
+            self._tune_hnsw()
+        except (ValueError, NotFoundError):
+            # Collection doesn't exist, create it. Cosine space makes
+            # search()'s 1 - distance an actual cosine similarity
             try:
                 self.collection = self.client.create_collection(
                     name=self.collection_name,
+                    configuration={"hnsw": {"space": "cosine", "ef_search": settings.hnsw_ef_search}},
                     embedding_function=self.embedding_function
                 )
                 logger.info("Created new collection")
             except Exception as e:
-                # If creation fails, try to get existing collection without embedding function
+                # If creation fails, try to get existing collection without embedding function.
+                # Writes and searches pass embeddings from our own service, so
+                # the collection's persisted embedding function is never called
                 logger.warning(f"Collection creation failed: {e}, attempting to load existing")
                 self.collection = self.client.get_collection(name=self.collection_name)
                 logger.info(f"Using existing collection: {self.collection.count()} docs")
     
+    def data_version(self) -> tuple:
+        """
+        Token that changes whenever any process writes to the collection.
+
+        The version file is atomically replaced on each write, so its inode
+        and mtime together identify the latest one.
+        """
+        try:
+            stat = os.stat(self.version_file_path)
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _mark_written(self):
+        """Publish a new data version after a write and drop this process's search results"""
+        temp_path = self.version_file_path.with_name(f"{self.version_file_path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(str(time.time_ns()))
+            os.replace(temp_path, self.version_file_path)
+        except OSError as e:
+            logger.warning(f"Could not publish collection version: {e}")
+        self._search_results.clear()
+        self._results_version = self.data_version()
+
+    def _tune_hnsw(self):
+        """
+        Apply the configured HNSW search breadth to an existing collection.
+
+        The distance space is fixed when a collection is created, but
+        ef_search (candidates explored per query, trading recall for latency)
+        can be changed in place.
+        """
+        try:
+            hnsw = (self.collection.configuration or {}).get('hnsw') or {}
+            if hnsw.get('ef_search') not in (None, settings.hnsw_ef_search):
+                self.collection.modify(configuration={"hnsw": {"ef_search": settings.hnsw_ef_search}})
+                logger.info(f"Set HNSW ef_search to {settings.hnsw_ef_search}")
+            if hnsw.get('space') not in (None, 'cosine'):
+                logger.info(f"Collection uses {hnsw['space']} distance; recreate it for cosine scores")
+        except Exception as e:
+            logger.warning(f"Could not tune HNSW search: {e}")
+
     def add_documents(self, texts: List[str], metadatas: List[dict], ids: List[str]):
         """
         Add documents to the vector store using upsert for reliability.
@@ -100,39 +232,50 @@ class ChromaVectorStore:
             # Optimized batch size based on document size and system memory
             BATCH_SIZE = self._calculate_optimal_batch_size(texts)
 
+            # Documents are embedded by the same service as queries rather
+            # than by the collection, whose embedding function is not
+            # persisted across restarts.
+            # Each upsert batch is embedded in one model call, padded to its
+            # longest text; grouping similar lengths into the same batch
+            # pads less. Upserts are keyed by id, so write order is free
+            if len(texts) > BATCH_SIZE:
+                order = sorted(range(len(texts)), key=lambda j: len(texts[j]))
+                texts = [texts[j] for j in order]
+                metadatas = [metadatas[j] for j in order]
+                ids = [ids[j] for j in order]
+
+            # Resolve the upsert method once rather than per batch and retry
+            upsert = self.collection.upsert
+
             added = 0
             for i in range(0, len(texts), BATCH_SIZE):
                 batch_end = min(i + BATCH_SIZE, len(texts))
 
                 # Clean metadata - Chroma hates None
-                clean_meta = []
-                for m in metadatas[i:batch_end]:
-                    # Sanitize metadata for ChromaDB compatibility
-                    clean = {}
-                    for k, v in m.items():
-                        if v is None:
-                            clean[k] = ""
-                        elif isinstance(v, str):
-                            # Strip high unicode that breaks Chroma
-                            clean[k] = v.encode('utf-8', 'ignore').decode('utf-8')
-                        else:
-                            clean[k] = v
-                    clean_meta.append(clean)
+                clean_meta = [_clean_metadata(m) for m in metadatas[i:batch_end]]
 
                 # Clean texts too
-                clean_texts = []
-                for t in texts[i:batch_end]:
-                    # Remove null bytes and high unicode
-                    cleaned = t.replace('\x00', '').encode('utf-8', 'ignore').decode('utf-8')
-                    clean_texts.append(cleaned)
+                clean_texts = [_clean_text(t) for t in texts[i:batch_end]]
+                batch_ids = ids[i:batch_end]
+
+                # Validate up front: empty documents are dropped here instead
+                # of surfacing as per-document failures inside Chroma
+                if not all(clean_texts):
+                    keep = [j for j, t in enumerate(clean_texts) if t]
+                    clean_texts = [clean_texts[j] for j in keep]
+                    clean_meta = [clean_meta[j] for j in keep]
+                    batch_ids = [batch_ids[j] for j in keep]
+                    if not clean_texts:
+                        continue
 
                 # Try to add with retry logic
                 for retry in range(CHROMADB_RETRY_ATTEMPTS):
                     try:
-                        self.collection.upsert(
+                        upsert(
                             documents=clean_texts,
+                            embeddings=self.embedding_function(clean_texts),
                             metadatas=clean_meta,
-                            ids=ids[i:batch_end]
+                            ids=batch_ids
                         )
                         added += len(clean_texts)
                         break
@@ -141,24 +284,125 @@ class ChromaVectorStore:
                             # Hit ChromaDB document limit
                             logger.error(f"ChromaDB quota exceeded (limit: {CHROMADB_DOCUMENT_LIMIT})")
                             raise
-                        elif retry < CHROMADB_RETRY_ATTEMPTS - 1:
+                        if retry < CHROMADB_RETRY_ATTEMPTS - 1:
                             # Retry with exponential backoff
                             wait_time = CHROMADB_RETRY_DELAY * (2 ** retry)
                             logger.warning(f"Retry {retry + 1}/{CHROMADB_RETRY_ATTEMPTS} for batch {i//BATCH_SIZE}, waiting {wait_time}s")
-                        time.sleep(0.5 * (retry + 1))  # Backoff
-                    else:
-                        logger.error(f"Failed batch {i//BATCH_SIZE}: {e}")
-                        # Skip this batch rather than fail everything
-                        break
-            
-            # Don't hammer ChromaDB
-            if len(texts) > 500:
-                time.sleep(0.1)  # Helps with large imports
+                            time.sleep(wait_time)
+                        else:
+                            # Persistent failure: isolate the bad documents
+                            # instead of dropping the whole batch
+                            logger.error(f"Failed batch {i//BATCH_SIZE}: {e}")
+                            added += self._upsert_bisect(clean_texts, clean_meta, batch_ids)
+
+            # Upserts are synchronous, so each batch has been persisted before
+            # the next starts; no pause between writes is needed
+
+            self._mark_written()
         
         logger.info(f"Added {added}/{len(texts)} documents")
         return added
     
-    def search(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict]:
+    def add_chunks(self, chunks: List[Dict], id_prefix: str) -> int:
+        """
+        Add chunker output in one batched add_documents call.
+
+        Chunks already stored under the same ID with the same chunk_id (a
+        hash of their content and position) are not embedded again, so
+        re-uploading an unchanged file skips the model entirely. If only their
+        metadata changed (e.g. a new source or upload time), it is updated in
+        place.
+
+        Args:
+            chunks: Chunks as returned by DocumentChunker ({'content', 'metadata'})
+            id_prefix: Prefix for the positional chunk IDs ("{id_prefix}_{i}")
+
+        Returns:
+            Number of chunks stored, including unchanged ones
+        """
+        ids = [f"{id_prefix}_{i}" for i in range(len(chunks))]
+        stored = self._stored_metadatas(ids)
+        texts, metadatas, new_ids = [], [], []
+        retagged_ids, retagged_metadatas = [], []
+        for doc_id, chunk in zip(ids, chunks):
+            chunk_id = chunk['metadata'].get('chunk_id')
+            previous = stored.get(doc_id)
+            if chunk_id is not None and previous is not None and previous.get('chunk_id') == chunk_id:
+                metadata = _clean_metadata(chunk['metadata'])
+                if metadata != previous:
+                    retagged_ids.append(doc_id)
+                    retagged_metadatas.append(metadata)
+                continue
+            texts.append(chunk['content'])
+            metadatas.append(chunk['metadata'])
+            new_ids.append(doc_id)
+
+        unchanged = len(ids) - len(new_ids)
+        if unchanged:
+            logger.info(f"Skipping {unchanged} unchanged chunks for {id_prefix}")
+        if retagged_ids:
+            self._update_metadatas(retagged_ids, retagged_metadatas)
+        if not new_ids:
+            return unchanged
+        return unchanged + self.add_documents(texts, metadatas, new_ids)
+
+    def _stored_metadatas(self, ids: List[str]) -> Dict[str, Dict]:
+        """Metadata of the given documents that are already stored (no documents or embeddings)"""
+        try:
+            existing = self.collection.get(ids=ids, include=["metadatas"])
+        except Exception as e:
+            logger.warning(f"Could not check stored chunks, writing all: {e}")
+            return {}
+        return {
+            doc_id: meta
+            for doc_id, meta in zip(existing.get('ids') or [], existing.get('metadatas') or [])
+            if meta
+        }
+
+    def _update_metadatas(self, ids: List[str], metadatas: List[Dict]):
+        """Replace stored metadata without re-embedding the documents"""
+        with self.lock:
+            for i in range(0, len(ids), XLARGE_BATCH_SIZE):
+                self.collection.update(ids=ids[i:i + XLARGE_BATCH_SIZE], metadatas=metadatas[i:i + XLARGE_BATCH_SIZE])
+            self._mark_written()
+        logger.info(f"Updated metadata of {len(ids)} unchanged chunks")
+
+    @staticmethod
+    def _prepare_query(query: str) -> str:
+        """Clean a query and pad short ones for better semantic matching"""
+        query = _clean_text(query)
+        if len(query.split()) < 3:
+            query = f"{query} documentation reference"
+        return query
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query exactly as search() would, so callers that also need the
+        vector (e.g. the semantic cache) can pass it back and skip a second
+        embedding round trip.
+
+        Recent queries are served from an in-memory LRU, so a client that
+        previews hits and then asks the same question embeds it once.
+        """
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries as embed_query() would, with all uncached ones
+        sent to the model in a single call.
+        """
+        prepared = [self._prepare_query(query) for query in queries]
+        embeddings = [self._query_embeddings.get(query) for query in prepared]
+        missing = list(dict.fromkeys(q for q, e in zip(prepared, embeddings) if e is None))
+        if missing:
+            computed = dict(zip(missing, self.embedding_function(missing)))
+            for query, embedding in computed.items():
+                self._query_embeddings.set(query, embedding)
+            embeddings = [computed[q] if e is None else e for q, e in zip(prepared, embeddings)]
+        return embeddings
+
+    def search(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None,
+               query_embedding: Optional[List[float]] = None) -> List[Dict]:
         """
         Search for similar documents using semantic similarity.
 
@@ -166,44 +410,136 @@ class ChromaVectorStore:
             query: Search query string
             k: Number of results to return (default: 5, max: 100)
             filter_dict: Optional metadata filters
+            query_embedding: Precomputed embed_query() vector for this query
 
         Returns:
             List of dictionaries containing matched documents with content, metadata, and similarity scores
+
+        Note: Repeated searches are answered from an in-memory cache until the
+            TTL expires or documents are added; callers get their own copies.
         """
-        # Clean query
-        query = query.encode('utf-8', 'ignore').decode('utf-8')
+        return self.search_batch([query], k, filter_dict, [query_embedding])[0]
 
-        # Enhance short queries for better semantic matching
-        if len(query.split()) < 3:
-            query = f"{query} documentation reference"
-        
+    def search_batch(self, queries: List[str], k: int = 5, filter_dict: Optional[Dict] = None,
+                     query_embeddings: Optional[List[Optional[List[float]]]] = None) -> List[List[Dict]]:
+        """
+        Run several searches that share k and filters as one ChromaDB multi-query.
+
+        Args:
+            queries: Search query strings
+            k: Number of results per query (max: 100)
+            filter_dict: Optional metadata filters applied to every query
+            query_embeddings: Optional precomputed vectors, None where unknown
+
+        Returns:
+            One search() result list per query, in input order
+        """
+        # Another process may have written since these results were cached
+        version = self.data_version()
+        if version != self._results_version:
+            self._search_results.clear()
+            self._results_version = version
+
+        filter_key = json.dumps(filter_dict, sort_keys=True, default=str) if filter_dict else None
+        cache_keys = [(self._prepare_query(query), k, filter_key) for query in queries]
+        results = [self._search_results.get(key) for key in cache_keys]
+
+        # One row per distinct uncached query; duplicates share its result
+        pending = {}
+        for i, (key, cached) in enumerate(zip(cache_keys, results)):
+            if cached is None:
+                pending.setdefault(key, i)
+
+        if pending:
+            try:
+                # Embed through our own service rather than query_texts, so the
+                # query cache applies and the collection's embedder is never needed
+                given = query_embeddings or [None] * len(queries)
+                embeddings = {i: given[i] for i in pending.values()}
+                unembedded = [i for i, embedding in embeddings.items() if embedding is None]
+                if unembedded:
+                    embeddings.update(zip(unembedded, self.embed_queries([queries[i] for i in unembedded])))
+
+                response = self.collection.query(
+                    query_embeddings=[embeddings[i] for i in pending.values()],
+                    n_results=min(k, 100),  # ChromaDB max is 100
+                    where=filter_dict
+                )
+
+                # Unpack weird ChromaDB response format
+                documents = response.get('documents') or []
+                metadatas = response.get('metadatas') or []
+                distances = response.get('distances') or []
+                for row, key in enumerate(pending):
+                    hits = self._format_hits(documents[row], metadatas[row], distances[row])
+                    self._search_results.set(key, hits)
+                    pending[key] = hits
+            except Exception as e:
+                logger.error(f"Search failed: {e}")
+                pending = dict.fromkeys(pending, _NO_HITS)  # Return empty rather than crash
+
+            results = [pending[key] if cached is None else cached for key, cached in zip(cache_keys, results)]
+
+        return [hits.to_dicts() for hits in results]
+
+    @staticmethod
+    def _format_hits(documents: List[str], metadatas: List[Dict], distances: List[float]) -> SearchHits:
+        """Format one query's raw ChromaDB results for the API"""
+        if not documents:
+            return _NO_HITS
+
+        # Convert distances to similarities in one array op
+        return SearchHits(
+            contents=list(documents),
+            metadatas=[meta or {} for meta in metadatas],
+            scores=1.0 - np.asarray(distances, dtype=np.float64)
+        )
+    
+    def get_by_metadata(self, where: Dict, limit: int = 20) -> List[Dict]:
+        """
+        Fetch stored chunks matching a metadata filter.
+
+        Unlike search(), this needs no query embedding or similarity ranking,
+        so it is the cheap way to enumerate or sample what a filter covers.
+
+        Args:
+            where: ChromaDB metadata filter
+            limit: Maximum number of chunks to return
+
+        Returns:
+            List of dictionaries containing content and metadata
+        """
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=min(k, 100),  # ChromaDB max is 100
-                where=filter_dict
-            )
-            
-            # Unpack weird ChromaDB response format
-            documents = results.get('documents', [[]])[0]
-            metadatas = results.get('metadatas', [[]])[0]
-            distances = results.get('distances', [[]])[0]
-            
-            # Format for API
-            formatted = []
-            for doc, meta, dist in zip(documents, metadatas, distances):
-                formatted.append({
-                    'content': doc,
-                    'metadata': meta or {},
-                    'score': 1 - dist  # Convert distance to similarity
-                })
-            
-            return formatted
-            
+            results = self.collection.get(where=where, limit=limit, include=["documents", "metadatas"])
+            return [
+                {'content': doc, 'metadata': meta or {}}
+                for doc, meta in zip(results.get('documents') or [], results.get('metadatas') or [])
+            ]
         except Exception as e:
-            logger.error(f"Search failed: {e}")
-            return []  # Return empty rather than crash
-    
+            logger.error(f"Metadata lookup failed: {e}")
+            return []
+
+    def sample_metadatas(self, where: Dict, limit: int = 10) -> List[Dict]:
+        """
+        Fetch only the metadata of chunks matching a filter.
+
+        For enumerating sources or checking that a filter matches anything,
+        where the document text would be read and discarded.
+
+        Args:
+            where: ChromaDB metadata filter
+            limit: Maximum number of chunks to sample
+
+        Returns:
+            List of metadata dictionaries
+        """
+        try:
+            results = self.collection.get(where=where, limit=limit, include=["metadatas"])
+            return [meta or {} for meta in results.get('metadatas') or []]
+        except Exception as e:
+            logger.error(f"Metadata sample failed: {e}")
+            return []
+
     def get_collection_stats(self) -> Dict:
         """
         Get collection statistics including document count and source distribution.
@@ -213,10 +549,11 @@ class ChromaVectorStore:
         """
         try:
             count = self.collection.count()
-            # Sample documents to analyze source distribution
-            sample = self.collection.get(limit=1000)
+            # Sample documents to analyze source distribution; only the
+            # metadata is needed, so don't pull document text over
+            sample = self.collection.get(limit=1000, include=["metadatas"])
             sources = {}
-            for meta in sample.get('metadatas', []):
+            for meta in sample.get('metadatas') or []:
                 if meta and 'source' in meta:
                     src = meta['source']
                     sources[src] = sources.get(src, 0) + 1
@@ -283,6 +620,7 @@ class ChromaVectorStore:
             try:
                 self.collection.upsert(
                     documents=clean_texts[batch_idx:batch_end],
+                    embeddings=self.embedding_function(clean_texts[batch_idx:batch_end]),
                     metadatas=clean_metadatas[batch_idx:batch_end],
                     ids=ids[batch_idx:batch_end]
                 )
@@ -290,21 +628,45 @@ class ChromaVectorStore:
 
             except Exception as e:
                 logger.error(f"Failed to add batch {current_batch}: {e}")
-                # Try individual documents in this batch
-                for i in range(batch_idx, batch_end):
-                    try:
-                        self.collection.upsert(
-                            documents=[clean_texts[i]],
-                            metadatas=[clean_metadatas[i]],
-                            ids=[ids[i]]
-                        )
-                        added += 1
-                    except Exception as individual_error:
-                        logger.warning(f"Skipped document {i}: {individual_error}")
+                added += self._upsert_bisect(
+                    clean_texts[batch_idx:batch_end],
+                    clean_metadatas[batch_idx:batch_end],
+                    ids[batch_idx:batch_end]
+                )
 
+        self._mark_written()
         logger.info(f"Successfully added {added}/{len(texts)} documents")
         return added
 
+    def _upsert_bisect(self, texts: List[str], metadatas: List[dict], ids: List[str]) -> int:
+        """
+        Re-upsert a batch that failed as a whole, halving it until the bad
+        documents are isolated.
+
+        Takes O(bad * log n) upserts instead of one call per document.
+
+        Returns:
+            Number of documents successfully added
+        """
+        if len(texts) == 1:
+            logger.warning(f"Skipped document {ids[0]}")
+            return 0
+
+        mid = len(texts) // 2
+        added = 0
+        for lo, hi in ((0, mid), (mid, len(texts))):
+            try:
+                self.collection.upsert(
+                    documents=texts[lo:hi],
+                    embeddings=self.embedding_function(texts[lo:hi]),
+                    metadatas=metadatas[lo:hi],
+                    ids=ids[lo:hi]
+                )
+                added += hi - lo
+            except Exception:
+                added += self._upsert_bisect(texts[lo:hi], metadatas[lo:hi], ids[lo:hi])
+        return added
+
     def _preprocess_documents(self, texts: List[str], metadatas: List[dict]) -> tuple:
         """Pre-process documents for optimal ChromaDB compatibility"""
         clean_texts = []
@@ -312,8 +674,7 @@ class ChromaVectorStore:
 
         for text, metadata in zip(texts, metadatas):
             # Clean text
-            cleaned_text = text.replace('\x00', '').encode('utf-8', 'ignore').decode('utf-8')
-            clean_texts.append(cleaned_text)
+            clean_texts.append(_clean_text(text))
 
             # Clean metadata
             clean_meta = {}
@@ -321,7 +682,7 @@ class ChromaVectorStore:
                 if v is None:
                     clean_meta[k] = ""
                 elif isinstance(v, str):
-                    clean_meta[k] = v.encode('utf-8', 'ignore').decode('utf-8')
+                    clean_meta[k] = _clean_text(v)
                 else:
                     clean_meta[k] = str(v)
             clean_metadatas.append(clean_meta)
@@ -334,8 +695,23 @@ class EmbeddingService:
     def __init__(self, base_embedding_function, model_name: str = "default"):
         self.base_function = base_embedding_function
         self.model_name = model_name
+        # Threads are only spawned on first use
+        self._executor = ThreadPoolExecutor(max_workers=max(1, settings.max_workers), thread_name_prefix="embed")
         logger.info(f"Initialized embedding service: {model_name}")
 
+    def _embed(self, texts: List[str]) -> List:
+        """
+        Run the base embedding function, sharding large inputs across threads.
+
+        The model forward pass releases the GIL, so shards embed concurrently
+        on separate cores; the ChromaDB write that follows stays serialized.
+        """
+        if settings.max_workers <= 1 or len(texts) < 2 * EMBEDDING_SHARD_SIZE:
+            return self.base_function(texts)
+
+        shards = [texts[i:i + EMBEDDING_SHARD_SIZE] for i in range(0, len(texts), EMBEDDING_SHARD_SIZE)]
+        return [e for shard in self._executor.map(self.base_function, shards) for e in shard]
+
     def name(self) -> str:
         return f"cached_{self.model_name}"
 
@@ -363,8 +739,8 @@ class EmbeddingService:
 
         # Generate embeddings for uncached texts
         if uncached_texts:
-            logger.debug(f"Generating {len(uncached_texts)} new embeddings")
-            new_embeddings = self.base_function(uncached_texts)
+            logger.debug("Generating %d new embeddings", len(uncached_texts))
+            new_embeddings = self._embed(uncached_texts)
 
             # Cache new embeddings and add to results
             cache_pairs = []
@@ -378,6 +754,57 @@ class EmbeddingService:
 
         return results
 
+class BatchWriter:
+    """
+    Writes document batches to a vector store on a background thread.
+
+    Producers call submit() while they keep chunking; the writer thread drains
+    a bounded queue into add_documents, so chunking the next document overlaps
+    with embedding and storing the previous batch. Embedding runs in native
+    code that releases the GIL, so a plain thread is enough.
+
+    Usage:
+        with BatchWriter(vector_store) as writer:
+            writer.submit(texts, metadatas, ids)
+        print(writer.added, writer.errors)
+    """
+
+    def __init__(self, vector_store, max_pending: int = INGEST_QUEUE_SIZE):
+        self._add_documents = vector_store.add_documents
+        self._queue = Queue(maxsize=max_pending)
+        self.added = 0
+        self.errors: List[Exception] = []
+        self._thread = Thread(target=self._run, name="vector-store-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str], metadatas: List[dict], ids: List[str]):
+        """Queue a batch for writing; blocks while the queue is full"""
+        self._queue.put((texts, metadatas, ids))
+
+    def close(self) -> int:
+        """Flush all queued batches and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
+        return self.added
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            try:
+                self.added += self._add_documents(*batch)
+            except Exception as e:
+                logger.error(f"Background write failed: {e}")
+                self.errors.append(e)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
 # Keep old import name for backwards compat
 VectorStore = ChromaVectorStore
 
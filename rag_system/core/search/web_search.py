@@ -3,6 +3,7 @@ Web Search Integration with Local Firecrawl and fallback options
 """
 
 import json
+import re
 import sys
 import os
 from typing import List, Dict, Optional
@@ -38,6 +39,10 @@ from rag_system.config.settings import get_settings
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Topic detection for fallback results, compiled once instead of lowercasing the query per term
+_PROGRAMMING_TERMS_RE = re.compile(r"\b(?:python|programming|code|functions?|tutorials?)\b", re.IGNORECASE)
+_WEB_TERMS_RE = re.compile(r"\b(?:fastapi|django|flask|web|apis?)\b", re.IGNORECASE)
+
 class WebSearchProvider:
     """Web search with multiple providers"""
 
@@ -121,7 +126,7 @@ class WebSearchProvider:
                     }
                     results.append(result)
 
-            logger.info(f"Local Firecrawl returned {len(results)} results for query: {query}")
+            logger.info("Local Firecrawl returned %d results for query: %s", len(results), query)
             return results
 
         except Exception as e:
@@ -170,7 +175,7 @@ class WebSearchProvider:
                     }
                     results.append(result)
 
-                logger.info(f"Firecrawl returned {len(results)} results for query: {query}")
+                logger.info("Firecrawl returned %d results for query: %s", len(results), query)
                 return results
 
             else:
@@ -236,7 +241,7 @@ class WebSearchProvider:
                         continue
 
                 if results:
-                    logger.info(f"DuckDuckGo web search returned {len(results)} results for query: {query}")
+                    logger.info("DuckDuckGo web search returned %d results for query: %s", len(results), query)
                     return results
 
             # If web scraping fails, try the API approach
@@ -294,7 +299,7 @@ class WebSearchProvider:
                             'score': 0.7
                         })
 
-                logger.info(f"DuckDuckGo returned {len(results)} results for query: {query}")
+                logger.info("DuckDuckGo returned %d results for query: %s", len(results), query)
 
                 # If no results from DuckDuckGo, provide fallback
                 if not results:
@@ -313,7 +318,7 @@ class WebSearchProvider:
         fallback_results = []
 
         # Generate helpful fallback content based on common programming queries
-        if any(term in query.lower() for term in ['python', 'programming', 'code', 'function', 'tutorial']):
+        if _PROGRAMMING_TERMS_RE.search(query):
             fallback_results.append({
                 'content': f"Web search for '{query}' - Local Firecrawl server not running and external search unavailable. For Python programming help, consider checking official documentation at python.org or popular resources like Real Python, Python.org tutorials, or Stack Overflow.",
                 'metadata': {
@@ -325,7 +330,7 @@ class WebSearchProvider:
                 'score': 0.6
             })
 
-        elif any(term in query.lower() for term in ['fastapi', 'django', 'flask', 'web', 'api']):
+        elif _WEB_TERMS_RE.search(query):
             fallback_results.append({
                 'content': f"Web search for '{query}' - For web development and API frameworks, check the official documentation: FastAPI (fastapi.tiangolo.com), Django (djangoproject.com), or Flask (flask.palletsprojects.com).",
                 'metadata': {
@@ -349,7 +354,7 @@ class WebSearchProvider:
                 'score': 0.5
             })
 
-        logger.info(f"Fallback search provided {len(fallback_results)} results for query: {query}")
+        logger.info("Fallback search provided %d results for query: %s", len(fallback_results), query)
         return fallback_results[:max_results]
 
     def crawl_url(self, url: str) -> Optional[Dict]:
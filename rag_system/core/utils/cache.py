@@ -4,15 +4,147 @@ Response Caching System for DocuMentor
 Implements persistent caching for LLM responses to reduce API calls and improve response times.
 Uses JSON format for security and portability.
 """
+import asyncio
 import hashlib
 import json
+import re
+import string
+import threading
 import time
-from typing import Dict, Optional, Any
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
 from pathlib import Path
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from rag_system.core.utils.logger import get_logger
+from rag_system.core.constants import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL
 
 logger = get_logger(__name__)
 
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize query text for exact-match cache keys.
+
+    Applies NFKC (so full-width and compatibility characters match their
+    plain forms), lowercases, drops punctuation and collapses whitespace so
+    trivially different spellings of the same question share one entry.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    return _WHITESPACE_RE.sub(' ', text.lower().translate(_PUNCTUATION_TABLE)).strip()
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache whose entries expire after a TTL.
+
+    Meant for hot-path results (e.g. complete API answers) that are cheap to
+    lose on restart, so unlike ResponseCache nothing is written to disk.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async computations of the same key.
+
+    The first caller for a key (the leader) computes it; callers arriving
+    while it runs await the leader's result instead of repeating the work.
+    Nothing is kept once the leader finishes, so this complements a cache
+    rather than replacing one.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of compute() for key, and whether it came from another caller's run"""
+        while (pending := self._pending.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                # The leader was cancelled (e.g. its client disconnected), not
+                # this caller: take over rather than fail an unrelated request
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        pending = asyncio.get_running_loop().create_future()
+        self._pending[key] = pending
+        try:
+            result = await compute()
+            pending.set_result(result)
+            return result, False
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._pending[key]
+            if not pending.done():
+                pending.cancel()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
 class ResponseCache:
     """
     In-memory cache for LLM responses with disk persistence.
@@ -37,8 +169,9 @@ class ResponseCache:
         """Load cache from disk using JSON format."""
         try:
             if self.cache_file.exists():
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.cache_file, 'rb') as f:
+                    raw = f.read()
+                return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
         except Exception as e:
             logger.warning(f"Failed to load cache: {e}")
         return {}
@@ -53,15 +186,22 @@ class ResponseCache:
             logger.warning(f"Failed to load cache metadata: {e}")
         return {"access_times": {}, "creation_times": {}}
 
+    def _write_cache_files(self):
+        """Write responses and metadata as indented JSON"""
+        if HAS_ORJSON:
+            self.cache_file.write_bytes(orjson.dumps(self.cache, option=orjson.OPT_INDENT_2))
+            self.metadata_file.write_bytes(orjson.dumps(self.metadata, option=orjson.OPT_INDENT_2))
+            return
+
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, indent=2, ensure_ascii=False)
+        with open(self.metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, indent=2)
+
     def _save_cache(self):
         """Save cache to disk using secure JSON format"""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, indent=2, ensure_ascii=False)
-
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2)
-
+            self._write_cache_files()
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
 
@@ -97,10 +237,10 @@ class ResponseCache:
         if cache_key in self.cache:
             # Update access time
             self.metadata["access_times"][cache_key] = time.time()
-            logger.debug(f"Cache hit for query: {query[:50]}...")
+            logger.debug("Cache hit for query: %s...", query[:50])
             return self.cache[cache_key]
 
-        logger.debug(f"Cache miss for query: {query[:50]}...")
+        logger.debug("Cache miss for query: %s...", query[:50])
         return None
 
     def set(self, query: str, search_results: list, response: str):
@@ -120,7 +260,7 @@ class ResponseCache:
         self.metadata["creation_times"][cache_key] = current_time
         self.metadata["access_times"][cache_key] = current_time
 
-        logger.debug(f"Cached response for query: {query[:50]}...")
+        logger.debug("Cached response for query: %s...", query[:50])
 
         # Save to disk periodically
         if len(self.cache) % 10 == 0:  # Save every 10 new entries
@@ -178,10 +318,7 @@ class ResponseCache:
                 # Use Path objects that have been cached
                 if hasattr(self, 'cache') and hasattr(self, 'metadata'):
                     try:
-                        with self.cache_file.open('w', encoding='utf-8') as f:
-                            json.dump(self.cache, f, indent=2, ensure_ascii=False)
-                        with self.metadata_file.open('w', encoding='utf-8') as f:
-                            json.dump(self.metadata, f, indent=2)
+                        self._write_cache_files()
                     except (OSError, IOError, PermissionError) as e:
                         logger.debug(f"Could not save cache on cleanup: {e}")
         except Exception as e:
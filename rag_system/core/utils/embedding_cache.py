@@ -8,6 +8,13 @@ import time
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 import numpy as np
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from rag_system.core.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -33,12 +40,14 @@ class EmbeddingCache:
         """Load embedding cache from disk using secure JSON format"""
         try:
             if self.cache_file.exists():
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    # Convert lists back to numpy arrays
-                    cache = {k: np.array(v) for k, v in cache_data.items()}
-                    logger.debug(f"Loaded {len(cache)} cached embeddings")
-                    return cache
+                with open(self.cache_file, 'rb') as f:
+                    raw = f.read()
+                cache_data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+                # Convert lists back to float32 arrays (plain np.array would
+                # give float64, doubling memory for every reloaded entry)
+                cache = {k: np.asarray(v, dtype=np.float32) for k, v in cache_data.items()}
+                logger.debug(f"Loaded {len(cache)} cached embeddings")
+                return cache
         except Exception as e:
             logger.warning(f"Failed to load embedding cache: {e}")
         return {}
@@ -53,20 +62,28 @@ class EmbeddingCache:
             logger.warning(f"Failed to load embedding metadata: {e}")
         return {"access_times": {}, "creation_times": {}, "text_lengths": {}}
 
+    def _write_cache_files(self):
+        """Write embeddings and metadata as JSON"""
+        if HAS_ORJSON:
+            # orjson serializes the numpy arrays natively, skipping the
+            # per-float Python list conversion the stdlib encoder needs
+            self.cache_file.write_bytes(orjson.dumps(self.cache, option=orjson.OPT_SERIALIZE_NUMPY))
+            self.metadata_file.write_bytes(orjson.dumps(self.metadata, option=orjson.OPT_INDENT_2))
+            return
+
+        # Convert numpy arrays to lists for JSON serialization
+        cache_data = {k: v.tolist() if isinstance(v, np.ndarray) else v
+                     for k, v in self.cache.items()}
+
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache_data, f)
+        with open(self.metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, indent=2)
+
     def _save_cache(self):
         """Save cache to disk using secure JSON format"""
         try:
-            # Convert numpy arrays to lists for JSON serialization
-            cache_data = {k: v.tolist() if isinstance(v, np.ndarray) else v
-                         for k, v in self.cache.items()}
-
-            # Save embeddings
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f)
-
-            # Save metadata
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2)
+            self._write_cache_files()
 
             logger.debug(f"Saved embedding cache with {len(self.cache)} entries")
 
@@ -78,9 +95,11 @@ class EmbeddingCache:
         # Normalize text for consistent caching
         normalized_text = text.strip().lower()
 
-        # Create hash from text + model name
+        # Create hash from text + model name. This runs for every text
+        # embedded, so it uses an 8-byte blake2b digest: cheaper than sha256
+        # on chunk-sized inputs and still collision-free in practice
         cache_input = f"{model_name}:{normalized_text}"
-        return hashlib.sha256(cache_input.encode()).hexdigest()
+        return hashlib.blake2b(cache_input.encode(), digest_size=8).hexdigest()
 
     def get_embedding(self, text: str, model_name: str = "default") -> Optional[np.ndarray]:
         """Get cached embedding if available"""
@@ -92,10 +111,10 @@ class EmbeddingCache:
         if cache_key in self.cache:
             # Update access time
             self.metadata["access_times"][cache_key] = time.time()
-            logger.debug(f"Cache hit for text: {text[:50]}...")
+            logger.debug("Cache hit for text: %s...", text[:50])
             return self.cache[cache_key]
 
-        logger.debug(f"Cache miss for text: {text[:50]}...")
+        logger.debug("Cache miss for text: %s...", text[:50])
         return None
 
     def set_embedding(self, text: str, embedding: np.ndarray, model_name: str = "default"):
@@ -109,14 +128,15 @@ class EmbeddingCache:
         if len(self.cache) >= self.max_cache_size:
             self._evict_oldest()
 
-        # Store embedding
-        self.cache[cache_key] = embedding
+        # Store as a compact float32 array, the model's own precision; a
+        # list of Python floats takes about 8x the memory
+        self.cache[cache_key] = np.asarray(embedding, dtype=np.float32)
         current_time = time.time()
         self.metadata["creation_times"][cache_key] = current_time
         self.metadata["access_times"][cache_key] = current_time
         self.metadata["text_lengths"][cache_key] = len(text)
 
-        logger.debug(f"Cached embedding for text: {text[:50]}...")
+        logger.debug("Cached embedding for text: %s...", text[:50])
 
         # Save to disk periodically
         if len(self.cache) % 50 == 0:  # Save every 50 new entries
@@ -135,7 +155,7 @@ class EmbeddingCache:
 
         if texts:
             hit_rate = cache_hits / len(texts) * 100
-            logger.info(f"Batch cache hit rate: {hit_rate:.1f}% ({cache_hits}/{len(texts)})")
+            logger.info("Batch cache hit rate: %.1f%% (%d/%d)", hit_rate, cache_hits, len(texts))
 
         return results
 
@@ -215,14 +235,7 @@ class EmbeddingCache:
         try:
             if hasattr(self, 'cache_file') and hasattr(self, 'cache') and hasattr(self, 'metadata'):
                 try:
-                    # Convert numpy arrays to lists for JSON serialization
-                    cache_data = {k: v.tolist() if isinstance(v, np.ndarray) else v
-                                 for k, v in self.cache.items()}
-
-                    with self.cache_file.open('w', encoding='utf-8') as f:
-                        json.dump(cache_data, f)
-                    with self.metadata_file.open('w', encoding='utf-8') as f:
-                        json.dump(self.metadata, f, indent=2)
+                    self._write_cache_files()
                 except (OSError, IOError, PermissionError) as e:
                     logger.debug(f"Could not save embedding cache on cleanup: {e}")
         except Exception as e:
@@ -1,10 +1,69 @@
 """
 Logger utility for DocuMentor
 """
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
+from rag_system.core.constants import LOG_FORMAT, LOG_DATE_FORMAT
+
+# Records from every logger go through one queue to a single listener thread,
+# so request threads only enqueue and never wait on console I/O
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_listener = None
+_listener_lock = threading.Lock()
+
+# The handler get_logger attaches; a forked child swaps it for a direct one
+_handler: logging.Handler = _queue_handler
+
+
+def _console_handler() -> logging.Handler:
+    """Handler that formats records and writes them to stdout"""
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    return console_handler
+
+
+def _start_listener():
+    """Start the thread that formats and writes queued records, once"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+
+        _listener = QueueListener(_log_queue, _console_handler())
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(_listener.stop)
+
+
+def _write_directly_after_fork():
+    """
+    Point a forked child's loggers at stdout instead of the queue.
+
+    The listener thread isn't copied into the child, so queued records would
+    never be written. Forked children (e.g. ingest workers) are short-lived
+    and exit without running atexit, so a new listener could lose its last
+    records too; they write synchronously instead.
+    """
+    global _handler
+    _handler = _console_handler()
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if isinstance(logger, logging.Logger) and _queue_handler in logger.handlers:
+            logger.removeHandler(_queue_handler)
+            logger.addHandler(_handler)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_write_directly_after_fork)
+
+
 def get_logger(name: str = "rag_system", level: str = "INFO") -> logging.Logger:
     """Get configured logger instance"""
 
@@ -19,18 +78,9 @@ def get_logger(name: str = "rag_system", level: str = "INFO") -> logging.Logger:
     log_level = getattr(logging, level.upper(), logging.INFO)
     logger.setLevel(log_level)
 
-    # Create console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-
     # Add handler to logger
-    logger.addHandler(console_handler)
+    if _handler is _queue_handler:
+        _start_listener()
+    logger.addHandler(_handler)
 
-    return logger
\ No newline at end of file
+    return logger
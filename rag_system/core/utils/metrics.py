@@ -187,11 +187,11 @@ def track_request_duration(endpoint: str, method: str):
         with track_request_duration('/api/search', 'POST'):
             # ... process request ...
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     try:
         yield
     finally:
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         api_request_duration.labels(endpoint=endpoint, method=method).observe(duration)
 
 
@@ -207,7 +207,7 @@ def track_llm_request(provider: str):
         with track_llm_request('ollama'):
             # ... call LLM ...
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     status = 'success'
     try:
         yield
@@ -216,7 +216,7 @@ def track_llm_request(provider: str):
         logger.error(f"LLM request failed: {e}")
         raise
     finally:
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         llm_request_duration.labels(provider=provider).observe(duration)
         llm_requests.labels(provider=provider, status=status).inc()
 
@@ -230,11 +230,11 @@ def track_vector_search():
         with track_vector_search():
             # ... perform search ...
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     try:
         yield
     finally:
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         vector_store_search_duration.observe(duration)
         vector_store_searches.inc()
 
@@ -0,0 +1,149 @@
+"""
+Semantic Cache for DocuMentor
+Reuses answers for paraphrased queries by comparing query embeddings
+"""
+import re
+import threading
+import time
+from typing import Any, Hashable, List, Optional, Sequence
+import numpy as np
+
+from rag_system.core.utils.logger import get_logger
+from rag_system.core.constants import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL
+
+logger = get_logger(__name__)
+
+_NEGATION_RE = re.compile(r"\b(not|no|never|without|don't|doesn't|isn't|can't|cannot|won't)\b", re.IGNORECASE)
+
+# Paraphrases rarely differ in length by more than this factor
+MAX_LENGTH_RATIO = 2.0
+
+
+class SemanticCache:
+    """
+    Second-level cache keyed by query embedding similarity.
+
+    Cached query embeddings live in one preallocated float32 matrix so a
+    lookup is a single matrix-vector product followed by argmax. Entries are
+    scoped (e.g. by filters and response mode) so a paraphrase only matches
+    answers produced under the same request options. The negation and length
+    guards are precomputed per entry and applied as masks before the argmax,
+    so the best compatible match wins even when a closer one is rejected.
+    Entries expire ttl seconds after they were added, like TTLCache's, and
+    expired ones are masked the same way. When full, the oldest entry is
+    overwritten.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = DEFAULT_CACHE_SIZE, initial_capacity: int = 64,
+                 ttl: float = DEFAULT_CACHE_TTL):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._capacity = max(1, min(initial_capacity, maxsize))
+        self._embeddings: Optional[np.ndarray] = None  # allocated on first add, once the dimension is known
+        self._scopes = np.zeros(self._capacity, dtype=np.int64)
+        self._negated = np.zeros(self._capacity, dtype=bool)
+        self._word_counts = np.ones(self._capacity, dtype=np.int32)
+        self._expires_at = np.zeros(self._capacity, dtype=np.float64)  # time.monotonic() deadlines
+        self._queries: List[str] = []
+        self._values: List[Any] = []
+        self._next = 0  # slot to overwrite once the cache is full
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _guard_features(query: str) -> tuple:
+        """Negation flag and word count, used to reject same-topic queries with different meanings"""
+        return bool(_NEGATION_RE.search(query)), len(query.split()) or 1
+
+    def get(self, embedding: Sequence[float], query: str, scope: Hashable = None) -> Optional[Any]:
+        """Return the value cached for the most similar query in scope, if similar enough"""
+        vector = self._normalize(embedding)
+        negated, words = self._guard_features(query)
+        with self._lock:
+            count = len(self._values)
+            if count and self._embeddings is not None and vector.shape[0] == self._embeddings.shape[1]:
+                scores = self._embeddings[:count] @ vector
+                counts = self._word_counts[:count]
+                rejected = (
+                    (self._scopes[:count] != hash(scope))
+                    | (self._negated[:count] != negated)
+                    | (np.maximum(counts, words) > MAX_LENGTH_RATIO * np.minimum(counts, words))
+                    | (self._expires_at[:count] <= time.monotonic())
+                )
+                scores[rejected] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    logger.debug("Semantic cache hit (%.3f) for query: %s...", scores[best], query[:50])
+                    return self._values[best]
+            self.misses += 1
+            return None
+
+    def add(self, embedding: Sequence[float], query: str, value: Any, scope: Hashable = None):
+        """Cache a value under a query embedding"""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self._capacity, vector.shape[0]), dtype=np.float32)
+            elif vector.shape[0] != self._embeddings.shape[1]:
+                return
+
+            count = len(self._values)
+            if count < self.maxsize:
+                if count == self._capacity:
+                    self._grow()
+                slot = count
+                self._queries.append(query)
+                self._values.append(value)
+            else:
+                slot = self._next
+                self._next = (self._next + 1) % self.maxsize
+                self._queries[slot] = query
+                self._values[slot] = value
+
+            self._embeddings[slot] = vector
+            self._scopes[slot] = hash(scope)
+            self._negated[slot], self._word_counts[slot] = self._guard_features(query)
+            self._expires_at[slot] = time.monotonic() + self.ttl
+
+    def _grow(self):
+        """Double capacity (up to maxsize) so appends stay amortized O(1)"""
+        self._capacity = min(self._capacity * 2, self.maxsize)
+        embeddings = np.zeros((self._capacity, self._embeddings.shape[1]), dtype=np.float32)
+        embeddings[:len(self._values)] = self._embeddings[:len(self._values)]
+        self._embeddings = embeddings
+        self._scopes = np.resize(self._scopes, self._capacity)
+        self._negated = np.resize(self._negated, self._capacity)
+        self._word_counts = np.resize(self._word_counts, self._capacity)
+        self._expires_at = np.resize(self._expires_at, self._capacity)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._queries.clear()
+            self._values.clear()
+            self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._values),
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -3,17 +3,21 @@ DocuMentor - Documentation Assistant
 """
 
 import streamlit as st
+import numpy as np
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from pathlib import Path
 
 # Import core components
 from rag_system.core import DocumentChunker, VectorStore, get_logger
+from rag_system.core.retrieval import BatchWriter
 from rag_system.core.processing import document_processor
 from rag_system.core.generation.llm_handler import llm_service
 from rag_system.core.search import web_search_provider
 from rag_system.config import get_settings
+from rag_system.core.constants import INGEST_BATCH_SIZE
 
 logger = get_logger(__name__)
 
@@ -30,6 +34,17 @@ TECHNOLOGY_MAPPING = {
     'langchain': 'LangChain'
 }
 
+def unique_sources(sources: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+    """Best-ranked source per title, keeping rank order; untitled sources are all kept"""
+    if not sources:
+        return []
+    titles = np.array([str((s.get('metadata') or {}).get('title') or '') for s in sources])
+    _, first_idx = np.unique(titles, return_index=True)
+    keep = np.zeros(len(sources), dtype=bool)
+    keep[first_idx] = True
+    keep |= titles == ''
+    return [sources[i] for i in np.flatnonzero(keep)[:limit]]
+
 def load_css():
     """Load custom CSS"""
     css_path = Path(__file__).parent / "styles.css"
@@ -140,29 +155,59 @@ def render_sidebar(components: Dict):
 def process_uploads(uploaded_files, components):
     """Handle file uploads"""
     count = 0
+
+    # Chunks from all files are queued and written in large batches so the
+    # embedding model and ChromaDB see a few big upserts instead of one per file.
+    # Writes run on a background thread while the next files are chunked.
+    batch_texts, batch_metas, batch_ids = [], [], []
+    batch_names = set()
+
     with st.spinner("Processing..."):
-        for file in uploaded_files:
-            try:
-                content = file.read()
-                result = components['document_processor'].process_file(file.name, content)
-                if result['success']:
-                    doc = {
-                        'title': file.name, 
-                        'content': result['content'], 
-                        'source': 'user_upload'
-                    }
-                    chunks = components['chunker'].chunk_document(doc)
-                    if chunks:
-                        texts = [c['content'] for c in chunks]
-                        metas = [c['metadata'] for c in chunks]
-                        ids = [f"upload_{file.name}_{i}" for i in range(len(chunks))]
-                        components['vector_store'].add_documents(texts, metas, ids)
-                        count += 1
-            except Exception as e:
-                st.error(f"Error processing {file.name}: {e}")
+        with BatchWriter(components['vector_store']) as writer:
+            for file in uploaded_files:
+                try:
+                    # Uploaded files are in-memory streams; the processor reads
+                    # them in place (CSVs in batches) instead of from a copy
+                    file.seek(0)
+                    result = components['document_processor'].process_file(file.name, file)
+                    if result['success']:
+                        doc = {
+                            'title': file.name, 
+                            'content': result['content'], 
+                            'source': 'user_upload'
+                        }
+                        chunks = components['chunker'].chunk_document(doc)
+                        if chunks:
+                            # A repeated file name reuses its chunk ids; write
+                            # the earlier copy first so ids in one upsert stay unique
+                            if file.name in batch_names:
+                                writer.submit(batch_texts, batch_metas, batch_ids)
+                                batch_texts, batch_metas, batch_ids = [], [], []
+                                batch_names = set()
+                            batch_names.add(file.name)
+                            batch_texts.extend(c['content'] for c in chunks)
+                            batch_metas.extend(c['metadata'] for c in chunks)
+                            batch_ids.extend(f"upload_{file.name}_{i}" for i in range(len(chunks)))
+                            count += 1
+
+                            if len(batch_texts) >= INGEST_BATCH_SIZE:
+                                writer.submit(batch_texts, batch_metas, batch_ids)
+                                batch_texts, batch_metas, batch_ids = [], [], []
+                                batch_names = set()
+                except Exception as e:
+                    st.error(f"Error processing {file.name}: {e}")
+
+            if batch_texts:
+                writer.submit(batch_texts, batch_metas, batch_ids)
+
+        for e in writer.errors:
+            st.error(f"Error saving uploaded documents: {e}")
     
-    if count > 0:
-        st.success(f"Processed {count} files")
+    # Report from the writer's local counter; querying collection stats here
+    # would add a full ChromaDB round trip to every upload. A rerun would
+    # clear the write errors above, so failed writes are left on screen
+    if writer.added and not writer.errors:
+        st.success(f"Processed {count} files ({writer.added} chunks stored)")
         time.sleep(1)
         st.rerun()
 
@@ -184,7 +229,7 @@ def main():
             st.markdown(msg["content"])
             if "sources" in msg:
                 with st.expander("Sources"):
-                    for s in msg["sources"]:
+                    for s in unique_sources(msg["sources"]):
                         st.markdown(f"- {s.get('metadata', {}).get('title', 'Unknown')}")
 
     if prompt := st.chat_input("Ask a question..."):
@@ -198,7 +243,7 @@ def main():
                 
                 if response.get('sources'):
                     with st.expander("Sources used"):
-                        for s in response['sources'][:5]:
+                        for s in unique_sources(response['sources'], limit=5):
                             meta = s.get('metadata', {})
                             st.markdown(f"- **{meta.get('title', 'Untitled')}** ({meta.get('technology', 'General')})")
 
@@ -214,17 +259,24 @@ def generate_response(question: str, settings: Dict, components: Dict) -> Dict:
         # Build filters
         filter_dict = settings['technology_filter']
         
-        # Search
-        search_results = []
-        if settings['response_mode'] != "Web Only":
-            search_results = components['vector_store'].search(
-                question,
-                k=settings['search_k'],
-                filter_dict=filter_dict
-            )
+        # Search: the web lookup runs on a worker thread while the vector
+        # store is queried, so the slower of the two sets the latency
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            web_future = None
+            if settings['enable_web_search']:
+                web_future = pool.submit(web_search_provider.search_web, question, max_results=3)
+
+            search_results = []
+            if settings['response_mode'] != "Web Only":
+                search_results = components['vector_store'].search(
+                    question,
+                    k=settings['search_k'],
+                    filter_dict=filter_dict
+                )
 
-        if settings['enable_web_search']:
-            search_results.extend(web_search_provider.search_web(question, max_results=3))
+            # Web results follow the vector hits
+            if web_future is not None:
+                search_results = search_results + web_future.result()
 
         # Generate
         if settings['response_mode'] == "Code Generation":
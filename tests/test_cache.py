@@ -1,11 +1,14 @@
 """
 Unit tests for response caching
 """
+import asyncio
 import pytest
 import tempfile
 import shutil
 from pathlib import Path
-from rag_system.core.utils.cache import ResponseCache
+import numpy as np
+from rag_system.core.utils.cache import ResponseCache, SingleFlight, TTLCache, normalize_query
+from rag_system.core.utils.embedding_cache import EmbeddingCache
 
 
 class TestResponseCache:
@@ -136,5 +139,144 @@ class TestResponseCache:
         assert stats["max_size"] == 10
 
 
+
+class TestTTLCache:
+    """Tests for the in-memory LRU + TTL cache"""
+
+    def test_set_and_get(self):
+        """Test that stored values are returned and counted as hits"""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("q", {"answer": 42})
+        assert cache.get("q") == {"answer": 42}
+        assert cache.get("missing") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_entries_expire(self, monkeypatch):
+        """Test that entries older than the TTL are treated as misses"""
+        import rag_system.core.utils.cache as cache_module
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = TTLCache(maxsize=4, ttl=10)
+        cache.set("q", "answer")
+        now[0] += 11
+        assert cache.get("q") is None
+        assert len(cache) == 0
+
+    def test_normalize_query(self):
+        """Test that case, punctuation and spacing differences normalize away"""
+        assert normalize_query("  How do I   use FastAPI? ") == normalize_query("how do i use fastapi")
+
+    def test_normalize_query_unicode_forms(self):
+        """Test that full-width characters normalize to their ASCII forms"""
+        assert normalize_query("ＦａｓｔＡＰＩ　routing") == normalize_query("fastapi routing")
+
+
+class TestSingleFlight:
+    """Tests for coalescing concurrent computations of one key"""
+
+    @staticmethod
+    def _slow_compute(calls, release):
+        """Compute that records each run and finishes when release is set"""
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return f"answer {len(calls)}"
+        return compute
+
+    def test_concurrent_callers_share_one_run(self):
+        """Test that callers arriving during a run get its result without computing"""
+        async def scenario():
+            flight, calls, release = SingleFlight(), [], asyncio.Event()
+            compute = self._slow_compute(calls, release)
+            tasks = [asyncio.create_task(flight.run("q", compute)) for _ in range(3)]
+            await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(*tasks), calls, len(flight)
+
+        results, calls, pending = asyncio.run(scenario())
+        assert results == [("answer 1", False), ("answer 1", True), ("answer 1", True)]
+        assert len(calls) == 1 and pending == 0
+
+    def test_waiter_takes_over_from_cancelled_leader(self):
+        """Test that cancelling the leader makes a waiter compute instead of failing"""
+        async def scenario():
+            flight, calls, release = SingleFlight(), [], asyncio.Event()
+            compute = self._slow_compute(calls, release)
+            leader = asyncio.create_task(flight.run("q", compute))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(flight.run("q", compute))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await waiter, calls
+
+        result, calls = asyncio.run(scenario())
+        assert result == ("answer 2", False)
+        assert len(calls) == 2
+
+    def test_cancelled_waiter_leaves_leader_running(self):
+        """Test that a waiter's own cancellation propagates without affecting the leader"""
+        async def scenario():
+            flight, calls, release = SingleFlight(), [], asyncio.Event()
+            compute = self._slow_compute(calls, release)
+            leader = asyncio.create_task(flight.run("q", compute))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(flight.run("q", compute))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            release.set()
+            return await leader
+
+        assert asyncio.run(scenario()) == ("answer 1", False)
+
+
+class TestEmbeddingCachePersistence:
+    """Tests for saving and reloading cached embeddings"""
+
+    def test_save_and_reload(self, tmp_path):
+        """Test that embeddings written to disk load back unchanged"""
+        cache = EmbeddingCache(cache_dir=str(tmp_path), max_cache_size=10)
+        cache.set_embedding("hello fastapi", np.array([0.25, -1.5, 3.0], dtype=np.float32))
+        cache._save_cache()
+
+        reloaded = EmbeddingCache(cache_dir=str(tmp_path), max_cache_size=10)
+        assert np.allclose(reloaded.get_embedding("hello fastapi"), [0.25, -1.5, 3.0])
+
+    def test_stored_as_float32(self, tmp_path):
+        """Test that list and float64 embeddings are kept as float32 arrays, also after reload"""
+        cache = EmbeddingCache(cache_dir=str(tmp_path), max_cache_size=10)
+        cache.set_embedding("from a list", [0.5, 1.0])
+        cache.set_embedding("from float64", np.array([0.5, 1.0]))
+        cache._save_cache()
+        reloaded = EmbeddingCache(cache_dir=str(tmp_path), max_cache_size=10)
+        for c in (cache, reloaded):
+            assert c.get_embedding("from a list").dtype == np.float32
+            assert c.get_embedding("from float64").dtype == np.float32
+
+    def test_keys_separate_models(self, tmp_path):
+        """Test that keys are stable, case-insensitive and distinct per model"""
+        cache = EmbeddingCache(cache_dir=str(tmp_path), max_cache_size=10)
+        key = cache._generate_cache_key("Hello FastAPI", "model-a")
+        assert key == cache._generate_cache_key("hello fastapi ", "model-a")
+        assert key != cache._generate_cache_key("hello fastapi", "model-b")
+        assert len(key) == 16
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,166 @@
+"""
+Unit tests for document chunking
+"""
+import pytest
+from rag_system.core.chunking import chunker as chunker_module
+from rag_system.core.chunking.chunker import DocumentChunker
+
+
+class TestSplitText:
+    """Tests for plain-text splitting"""
+
+    @pytest.fixture
+    def chunker(self):
+        """Create a DocumentChunker with small chunks for testing"""
+        return DocumentChunker(chunk_size=100, chunk_overlap=20)
+
+    @pytest.fixture
+    def long_text(self):
+        """Multi-sentence text longer than several chunks"""
+        return " ".join(f"Sentence number {i} talks about FastAPI routing." for i in range(40))
+
+    def test_short_text_single_chunk(self, chunker):
+        """Test that text shorter than the chunk size is kept whole"""
+        chunks = chunker._split_text("A short sentence.")
+        assert chunks == ["A short sentence."]
+
+    def test_chunks_respect_size(self, chunker, long_text):
+        """Test that no chunk greatly exceeds the configured size"""
+        chunks = chunker._split_text(long_text)
+        assert len(chunks) > 1
+        assert all(len(c) <= chunker.chunk_size for c in chunks)
+
+    def test_chunks_cover_text(self, chunker, long_text):
+        """Test that every sentence ends up in some chunk"""
+        chunks = chunker._split_text(long_text)
+        for i in (0, 17, 39):
+            assert any(f"Sentence number {i} " in c for c in chunks)
+
+    def test_chunks_trimmed(self, chunker, long_text):
+        """Test that split chunks carry no surrounding whitespace"""
+        chunks = chunker._split_text(long_text.replace(". ", ".\n  "))
+        assert all(c == c.strip() for c in chunks)
+
+    def test_whitespace_only_text(self, chunker):
+        """Test that whitespace-only input produces no chunks"""
+        assert chunker._split_text("   \n\n  ") == []
+
+    def test_fallback_without_memchunk(self, chunker, long_text, monkeypatch):
+        """Test that the LangChain splitter is used when memchunk is missing"""
+        monkeypatch.setattr(chunker_module, "HAS_MEMCHUNK", False)
+        chunks = chunker._split_text(long_text)
+        assert chunks == chunker.text_splitter.split_text(long_text)
+
+    def test_fallback_skips_short_text(self, chunker, monkeypatch):
+        """Test that short text bypasses the LangChain splitter too"""
+        monkeypatch.setattr(chunker_module, "HAS_MEMCHUNK", False)
+        monkeypatch.setattr(chunker.text_splitter, "split_text", lambda text: pytest.fail("splitter called"))
+        assert chunker._split_text("A short sentence.") == ["A short sentence."]
+
+
+class TestMixedContent:
+    """Tests for documents mixing prose and fenced code"""
+
+    @pytest.fixture
+    def chunker(self):
+        """Create a DocumentChunker with small chunks for testing"""
+        return DocumentChunker(chunk_size=200, chunk_overlap=20)
+
+    def test_code_blocks_kept_separate(self, chunker):
+        """Test that code blocks become their own chunks between text chunks"""
+        content = (
+            "Intro text about routes. "
+            "```python\n@app.get('/')\ndef root():\n    return {}\n```"
+            " Closing text about responses."
+        )
+        chunks = chunker._chunk_mixed_content(content, {})
+        types = [c['metadata']['chunk_type'] for c in chunks]
+        assert types == ['text', 'code', 'text']
+        assert chunks[1]['content'].startswith('```python')
+
+
+class TestDocumentDedup:
+    """Tests for skipping duplicate documents before chunking"""
+
+    def test_duplicates_skipped(self):
+        """Test that repeated (source, content) pairs are yielded once"""
+        docs = [
+            {'source': 'fastapi', 'content': 'Path parameters'},
+            {'source': 'fastapi', 'content': 'Path parameters'},
+            {'source': 'langchain', 'content': 'Path parameters'},
+        ]
+        unique = list(chunker_module._iter_unique_documents(docs))
+        assert [d['source'] for d in unique] == ['fastapi', 'langchain']
+
+    def test_fallback_without_xxhash(self, monkeypatch):
+        """Test that hashing still works when xxhash is missing"""
+        monkeypatch.setattr(chunker_module, "HAS_XXHASH", False)
+        assert chunker_module._content_hash("abc") == chunker_module._content_hash("abc")
+        assert chunker_module._content_hash("abc") != chunker_module._content_hash("abd")
+
+    def test_duplicate_chunks_dropped(self):
+        """Test that repeated chunk content is kept once, in original order"""
+        chunks = [{'content': c, 'metadata': {}} for c in ("a", "b", "a", "c", "b")]
+        deduped = chunker_module._dedupe_chunks(chunks)
+        assert [c['content'] for c in deduped] == ["a", "b", "c"]
+
+
+class TestChunkStats:
+    """Tests for chunk statistics"""
+
+    def test_stats_counts(self):
+        """Test that sizes, types and sources are tallied from the chunks"""
+        chunker = DocumentChunker(chunk_size=100, chunk_overlap=20)
+        chunks = [
+            {'content': 'abcd', 'metadata': {'chunk_type': 'text', 'source': 'a', 'word_count': 1}},
+            {'content': 'ab', 'metadata': {'chunk_type': 'code', 'source': 'a', 'word_count': 3}},
+        ]
+        stats = chunker._calculate_chunk_stats(chunks)
+        assert stats['total_chunks'] == 2
+        assert stats['avg_chunk_size'] == 3
+        assert (stats['min_chunk_size'], stats['max_chunk_size']) == (2, 4)
+        assert stats['avg_word_count'] == 2
+        assert stats['chunk_types'] == {'text': 1, 'code': 1}
+        assert stats['sources'] == {'a': 2}
+
+
+class TestChunkId:
+    """Tests for chunk ID generation"""
+
+    @pytest.mark.parametrize("has_xxhash", [True, False])
+    def test_ids_stable_and_positional(self, has_xxhash, monkeypatch):
+        """Test that IDs are deterministic, 16 hex chars and depend on position"""
+        if has_xxhash and not chunker_module.HAS_XXHASH:
+            pytest.skip("xxhash not installed")
+        monkeypatch.setattr(chunker_module, "HAS_XXHASH", has_xxhash)
+        chunker = DocumentChunker(chunk_size=100, chunk_overlap=20)
+        first = chunker._generate_chunk_id("same text", 0)
+        assert first == chunker._generate_chunk_id("same text", 0)
+        assert first != chunker._generate_chunk_id("same text", 1)
+        assert len(first) == 16 and int(first, 16) >= 0
+
+
+class TestIngestCache:
+    """Tests for skipping unchanged source files"""
+
+    @pytest.fixture
+    def raw_files(self, tmp_path, monkeypatch):
+        """Point the chunker at a temporary data tree with one source file"""
+        monkeypatch.setattr(chunker_module.settings, "upload_dir", str(tmp_path / "uploads"))
+        monkeypatch.setattr(chunker_module.settings, "cache_dir", str(tmp_path / "cache"))
+        source = tmp_path / "raw" / "fastapi" / "fastapi_docs.json"
+        source.parent.mkdir(parents=True)
+        source.write_text('[{"title": "Intro", "source": "fastapi", "content": "FastAPI is fast."}]')
+        return source
+
+    def test_unchanged_file_skipped(self, raw_files):
+        """Test that a second run over the same file produces no chunks"""
+        chunker = DocumentChunker(chunk_size=100, chunk_overlap=20)
+        assert chunker.chunk_documents_from_files(skip_unchanged=True)
+        assert chunker.chunk_documents_from_files(skip_unchanged=True) == []
+        # Without the flag every file is processed
+        assert chunker.chunk_documents_from_files()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+"""
+Unit tests for document processing
+"""
+import importlib
+import io
+import pytest
+from rag_system.core.processing.document_processor import EnhancedDocumentProcessor
+
+# The package re-exports the processor instance under the module's name
+processor_module = importlib.import_module("rag_system.core.processing.document_processor")
+
+
+class TestStreamedContent:
+    """Tests for processing uploads passed as binary streams"""
+
+    @pytest.fixture
+    def processor(self):
+        """Create a document processor"""
+        return EnhancedDocumentProcessor()
+
+    @pytest.fixture
+    def csv_bytes(self):
+        """CSV content spanning several read batches"""
+        return ("id,name\n" + "".join(f"{i},row{i}\n" for i in range(25))).encode()
+
+    def test_text_stream_matches_bytes(self, processor):
+        """Test that text streams and bytes produce the same content"""
+        data = "Hello FastAPI".encode()
+        assert processor.process_file("a.txt", io.BytesIO(data))['content'] == \
+            processor.process_file("a.txt", data)['content']
+
+    def test_markdown_extension_processed_as_text(self, processor):
+        """Test that the long .markdown extension is handled like .md"""
+        result = processor.process_file("notes.markdown", io.BytesIO(b"# Title"))
+        assert result['success'] and result['content'] == "# Title"
+
+    def test_csv_counts_rows_across_batches(self, processor, csv_bytes, monkeypatch):
+        """Test that batched CSV reading reports the full row count and a preview"""
+        monkeypatch.setattr(processor_module, "CSV_READ_CHUNK_ROWS", 4)
+        result = processor.process_file("data.csv", io.BytesIO(csv_bytes))
+        assert result['success']
+        assert result['metadata']['rows'] == 25
+        assert result['metadata']['column_names'] == ['id', 'name']
+        assert "... and 15 more rows" in result['content']
+
+    def test_csv_pandas_fallback_matches_arrow(self, processor, csv_bytes, monkeypatch):
+        """Test that the pyarrow and pandas readers summarize a CSV identically"""
+        pytest.importorskip("pyarrow")
+        arrow_result = processor.process_file("data.csv", csv_bytes)
+        monkeypatch.setattr(processor_module, "HAS_PYARROW", False)
+        assert processor.process_file("data.csv", csv_bytes) == arrow_result
+
+
+    def test_csv_arrow_rejection_falls_back_to_pandas(self, processor, monkeypatch):
+        """Test that a CSV whose later rows break Arrow's inferred types is read by pandas"""
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(processor_module, "CSV_ARROW_BLOCK_SIZE", 64)
+        data = ("id\n" + "".join(f"{i}\n" for i in range(40)) + "abc\n").encode()
+        result = processor.process_file("data.csv", io.BytesIO(data))
+        assert result['success']
+        assert result['metadata']['rows'] == 41
+
+    def test_csv_fallback_rewinds_closed_stream(self, processor, csv_bytes, monkeypatch):
+        """Test that pandas re-reads the stream from the start after Arrow gives up"""
+        class ArrowInvalid(Exception):
+            pass
+
+        def open_csv(stream, read_options=None):
+            stream.read(10)
+            stream.close()
+            raise ArrowInvalid("CSV conversion error")
+
+        monkeypatch.setattr(processor_module, "HAS_PYARROW", True)
+        monkeypatch.setattr(processor_module, "pa", type("pa", (), {"ArrowInvalid": ArrowInvalid}), raising=False)
+        monkeypatch.setattr(processor_module, "pa_csv", type("pa_csv", (), {
+            "open_csv": staticmethod(open_csv), "ReadOptions": staticmethod(lambda **kwargs: None)
+        }), raising=False)
+        stream = io.BytesIO(csv_bytes)
+        result = processor.process_file("data.csv", stream)
+        assert result['success']
+        assert result['metadata']['rows'] == 25
+        assert result['metadata']['column_names'] == ['id', 'name']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,193 @@
+"""
+Unit tests for LLM provider request building
+"""
+import pytest
+from rag_system.core.generation import llm_handler
+from rag_system.core.generation.llm_handler import LLMErrorMessage, OllamaProvider
+
+
+class TestOllamaPrompt:
+    """Tests for the prompt sent to Ollama"""
+
+    @pytest.fixture
+    def sent(self, monkeypatch):
+        """Capture the JSON payloads posted to Ollama"""
+        payloads = []
+
+        class FakeResponse:
+            status_code = 200
+
+            def json(self):
+                return {'response': 'ok'}
+
+        def fake_post(url, json, timeout):
+            payloads.append(json)
+            return FakeResponse()
+
+        monkeypatch.setattr(llm_handler.requests, "post", fake_post)
+        return payloads
+
+    def test_same_chunks_same_prompt(self, sent):
+        """Test that retrieval order doesn't change the prompt, so its prefix can be cached"""
+        chunks = [{'content': f"chunk {n}", 'metadata': {'chunk_id': f"id{n}", 'title': 'Doc'}} for n in range(3)]
+        provider = OllamaProvider()
+        provider.generate_response("How?", chunks)
+        provider.generate_response("How?", list(reversed(chunks)))
+        assert sent[0]['prompt'] == sent[1]['prompt']
+
+    def test_stable_system_prompt(self, sent):
+        """Test that the fixed instructions go in the system field"""
+        OllamaProvider().generate_response("How?", [])
+        assert sent[0]['system'] == llm_handler.OLLAMA_SYSTEM_PROMPT
+
+    def test_preload_sends_no_prompt(self, sent):
+        """Test that preloading only asks Ollama to load the model"""
+        assert OllamaProvider().preload()
+        assert 'prompt' not in sent[0] and sent[0]['keep_alive'] == llm_handler.settings.ollama_keep_alive
+
+
+class TestOllamaRetry:
+    """Tests for retrying failed Ollama calls"""
+
+    @pytest.fixture
+    def post_failing(self, monkeypatch):
+        """Make requests.post raise the given errors in turn, then succeed"""
+        monkeypatch.setattr(llm_handler.time, "sleep", lambda seconds: None)
+        calls = []
+
+        def _install(*errors):
+            class FakeResponse:
+                status_code = 200
+
+                def json(self):
+                    return {'response': 'ok'}
+
+            def fake_post(url, json, timeout):
+                calls.append(url)
+                if len(calls) <= len(errors):
+                    raise errors[len(calls) - 1]
+                return FakeResponse()
+
+            monkeypatch.setattr(llm_handler.requests, "post", fake_post)
+            return calls
+        return _install
+
+    def test_refused_connection_retried(self, post_failing):
+        """Test that a refused connection is retried until Ollama answers"""
+        calls = post_failing(llm_handler.requests.ConnectionError(), llm_handler.requests.ConnectionError())
+        answer = OllamaProvider().generate_response("How?", [])
+        assert answer == "ok" and not isinstance(answer, LLMErrorMessage)
+        assert len(calls) == 3
+
+    def test_timeout_not_retried(self, post_failing):
+        """Test that a timed-out generation fails without another attempt"""
+        calls = post_failing(llm_handler.requests.ReadTimeout())
+        answer = OllamaProvider().generate_response("How?", [])
+        assert answer.startswith("Error") and isinstance(answer, LLMErrorMessage)
+        assert len(calls) == 1
+
+
+class TestOllamaStream:
+    """Tests for streaming Ollama output"""
+
+    @pytest.fixture
+    def stream_lines(self, monkeypatch):
+        """Serve the given JSON lines as a streamed Ollama response"""
+        sent = []
+
+        def _install(*lines, status_code=200):
+            class FakeResponse:
+                def __init__(self):
+                    self.status_code = status_code
+
+                def __enter__(self):
+                    return self
+
+                def __exit__(self, *exc):
+                    return False
+
+                def iter_lines(self):
+                    return iter(lines)
+
+            def fake_post(url, json, timeout, stream=False):
+                sent.append((json, stream))
+                return FakeResponse()
+
+            monkeypatch.setattr(llm_handler.requests, "post", fake_post)
+            return sent
+        return _install
+
+    def test_tokens_yielded_in_order(self, stream_lines):
+        """Test that each line's text is yielded and the done line ends the stream"""
+        sent = stream_lines(b'{"response": "Hel"}', b'', b'{"response": "lo"}', b'{"response": "", "done": true}')
+        assert list(OllamaProvider().stream_response("How?", [])) == ["Hel", "lo"]
+        assert sent[0][0]['stream'] is True and sent[0][1] is True
+
+    def test_http_error_yields_message(self, stream_lines):
+        """Test that a failed request yields one error message"""
+        stream_lines(status_code=500)
+        tokens = list(OllamaProvider().stream_response("How?", []))
+        assert tokens == ["Error: Ollama request failed with status 500"]
+        assert isinstance(tokens[0], LLMErrorMessage)
+
+    def test_non_streaming_provider_yields_whole_answer(self, monkeypatch):
+        """Test that providers without streaming yield their full response once"""
+        provider = llm_handler.OpenAIProvider()
+        monkeypatch.setattr(provider, "generate_response", lambda prompt, context: "full answer")
+        assert list(provider.stream_response("How?", [])) == ["full answer"]
+
+
+class TestOllamaAvailability:
+    """Tests for the cached Ollama availability check"""
+
+    @pytest.fixture
+    def tags_status(self, monkeypatch):
+        """Answer /api/tags with the given status codes in turn, counting requests"""
+        calls = []
+
+        def _install(*codes):
+            class FakeResponse:
+                def __init__(self, status_code):
+                    self.status_code = status_code
+
+            def fake_get(url, timeout):
+                calls.append(url)
+                return FakeResponse(codes[min(len(calls), len(codes)) - 1])
+
+            monkeypatch.setattr(llm_handler.requests, "get", fake_get)
+            return calls
+        return _install
+
+    def test_success_reused(self, tags_status):
+        """Test that a successful check spares the next request a round trip"""
+        calls = tags_status(200)
+        provider = OllamaProvider()
+        assert provider.is_available() and provider.is_available()
+        assert len(calls) == 1
+
+    def test_failure_rechecked(self, tags_status):
+        """Test that an unavailable server is asked again on the next check"""
+        calls = tags_status(503, 200)
+        provider = OllamaProvider()
+        assert not provider.is_available()
+        assert provider.is_available()
+        assert len(calls) == 2
+
+
+class TestFormatContext:
+    """Tests for the numbered context block"""
+
+    def test_layout(self):
+        """Test that results are numbered, titled and truncated"""
+        results = [{'content': "abcdef", 'metadata': {'title': 'Doc'}}, {'content': "xyz"}]
+        assert llm_handler._format_context(results, 3) == (
+            "Context from documents:\n\n1. From 'Doc':\nabc...\n\n2. From 'Unknown':\nxyz...\n"
+        )
+
+    def test_empty(self):
+        """Test that no results give no context block"""
+        assert llm_handler._format_context([], 500) == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
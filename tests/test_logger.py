@@ -0,0 +1,31 @@
+"""
+Unit tests for the logging setup
+"""
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from rag_system.core.utils.logger import get_logger
+
+
+def _log_in_worker(message: str) -> bool:
+    get_logger("rag_system.tests.fork").warning(message)
+    return True
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork start method is POSIX-only")
+class TestForkedWorkers:
+    """Tests for logging from forked worker processes"""
+
+    def test_pool_worker_records_written(self, capfd):
+        """Test that a record logged in a forked pool worker reaches stdout"""
+        # Created before the fork, so the worker inherits the queue handler
+        get_logger("rag_system.tests.fork")
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+            assert executor.submit(_log_in_worker, "logged from the pool worker").result()
+        assert "logged from the pool worker" in capfd.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,89 @@
+"""
+Unit tests for coalescing concurrent searches
+"""
+import asyncio
+import time
+import pytest
+from rag_system.core.retrieval import SearchBatcher
+
+
+class RecordingStore:
+    """Vector store stub that records each batched call"""
+
+    def __init__(self):
+        self.embed_calls = []
+        self.search_calls = []
+
+    def embed_queries(self, queries):
+        self.embed_calls.append(list(queries))
+        return [[float(len(q))] for q in queries]
+
+    def search_batch(self, queries, k, filter_dict, query_embeddings):
+        self.search_calls.append((list(queries), k, filter_dict))
+        return [[{'content': q, 'metadata': {}, 'score': 1.0}] for q in queries]
+
+
+class TestSearchBatcher:
+    """Tests for SearchBatcher"""
+
+    @pytest.fixture
+    def store(self):
+        """Fresh recording store"""
+        return RecordingStore()
+
+    def test_concurrent_embeds_share_one_call(self, store):
+        """Test that embeddings requested together run as one model call"""
+        async def run():
+            batcher = SearchBatcher(store)
+            results = await asyncio.gather(*(batcher.embed("q" * n) for n in range(1, 6)))
+            await batcher.close()
+            return results
+
+        assert asyncio.run(run()) == [[float(n)] for n in range(1, 6)]
+        assert len(store.embed_calls) == 1
+
+    def test_idle_call_not_delayed(self, store):
+        """Test that a lone call on an idle batcher doesn't wait out the window"""
+        async def run():
+            batcher = SearchBatcher(store, window=5.0)
+            start = time.perf_counter()
+            await batcher.embed("q")
+            elapsed = time.perf_counter() - start
+            await batcher.close()
+            return elapsed
+
+        assert asyncio.run(run()) < 1.0
+
+    def test_searches_grouped_by_options(self, store):
+        """Test that searches only share a query when k and filters match"""
+        async def run():
+            batcher = SearchBatcher(store)
+            results = await asyncio.gather(
+                batcher.search("a", k=5),
+                batcher.search("b", k=5),
+                batcher.search("c", k=5, filter_dict={"technology": "fastapi"}),
+            )
+            await batcher.close()
+            return results
+
+        results = asyncio.run(run())
+        assert [r[0]['content'] for r in results] == ["a", "b", "c"]
+        assert sorted(queries for queries, _, _ in store.search_calls) == [["a", "b"], ["c"]]
+
+    def test_failure_reaches_every_caller(self, store):
+        """Test that a failed batch raises in each waiting request"""
+        def fail(queries):
+            raise RuntimeError("model unavailable")
+        store.embed_queries = fail
+
+        async def run():
+            batcher = SearchBatcher(store)
+            results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+            await batcher.close()
+            return results
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,75 @@
+"""
+Unit tests for the semantic (embedding similarity) cache
+"""
+import pytest
+from rag_system.core.utils import semantic_cache
+from rag_system.core.utils.semantic_cache import SemanticCache
+
+
+class TestSemanticCache:
+    """Tests for paraphrase matching on query embeddings"""
+
+    @pytest.fixture
+    def cache(self):
+        """Create a SemanticCache with a small initial capacity"""
+        return SemanticCache(threshold=0.9, maxsize=8, initial_capacity=2)
+
+    def test_similar_query_hits(self, cache):
+        """Test that a near-identical embedding returns the cached value"""
+        cache.add([1.0, 0.0, 0.0], "reset my password", "answer")
+        assert cache.get([0.99, 0.05, 0.0], "how to reset password") == "answer"
+
+    def test_dissimilar_query_misses(self, cache):
+        """Test that an unrelated embedding is a miss"""
+        cache.add([1.0, 0.0, 0.0], "reset my password", "answer")
+        assert cache.get([0.0, 1.0, 0.0], "install fastapi") is None
+
+    def test_scope_must_match(self, cache):
+        """Test that entries cached under other request options are ignored"""
+        cache.add([1.0, 0.0, 0.0], "reset my password", "code answer", scope="code")
+        assert cache.get([1.0, 0.0, 0.0], "reset my password", scope="smart") is None
+        assert cache.get([1.0, 0.0, 0.0], "reset my password", scope="code") == "code answer"
+
+    def test_negation_guard(self, cache):
+        """Test that a negated paraphrase does not reuse the answer"""
+        cache.add([1.0, 0.0, 0.0], "use async endpoints", "answer")
+        assert cache.get([1.0, 0.0, 0.0], "do not use async endpoints") is None
+
+    def test_guard_falls_back_to_compatible_entry(self, cache):
+        """Test that a rejected closest entry doesn't hide a compatible one above threshold"""
+        cache.add([1.0, 0.0, 0.0], "do not use async endpoints", "negated answer")
+        cache.add([0.95, 0.3, 0.0], "use async endpoints", "answer")
+        assert cache.get([1.0, 0.0, 0.0], "use async endpoints") == "answer"
+
+    def test_growth_and_wraparound(self, cache):
+        """Test that the cache grows past its initial capacity and overwrites the oldest when full"""
+        for i in range(10):
+            vec = [0.0] * 10
+            vec[i] = 1.0
+            cache.add(vec, f"query {i}", i)
+        assert len(cache) == 8
+        first = [0.0] * 10
+        first[0] = 1.0
+        last = [0.0] * 10
+        last[9] = 1.0
+        assert cache.get(first, "query 0") is None
+        assert cache.get(last, "query 9") == 9
+
+
+    def test_expired_entries_ignored(self, monkeypatch):
+        """Test that entries stop matching after their TTL, without hiding fresher compatible ones"""
+        now = [1000.0]
+        monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+        cache = SemanticCache(threshold=0.9, maxsize=8, ttl=60)
+        cache.add([1.0, 0.0, 0.0], "reset my password", "old answer")
+        now[0] += 30
+        cache.add([0.95, 0.3, 0.0], "reset the password", "new answer")
+        assert cache.get([1.0, 0.0, 0.0], "reset my password") == "old answer"
+        now[0] += 45
+        assert cache.get([1.0, 0.0, 0.0], "reset my password") == "new answer"
+        now[0] += 60
+        assert cache.get([1.0, 0.0, 0.0], "reset my password") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
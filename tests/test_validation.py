@@ -1,14 +1,19 @@
 """
 Unit tests for input validation functions
 """
+import asyncio
+import io
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
+from rag_system.api.middleware import validation
 from rag_system.api.middleware.validation import (
+    validate_file_upload,
     validate_query,
     validate_search_k,
     validate_temperature,
     validate_max_tokens,
-    sanitize_filename
+    sanitize_filename,
+    UploadSizeLimitMiddleware
 )
 
 
@@ -149,5 +154,73 @@ class TestFilenameSanitization:
             sanitize_filename("")
 
 
+class TestFileUploadValidation:
+    """Tests for upload validation"""
+
+    def test_only_header_sniffed(self, monkeypatch):
+        """Test that MIME detection sees the header, not the whole file, and the stream is rewound"""
+        seen = []
+        monkeypatch.setattr(validation.magic, "from_buffer", lambda data, mime: seen.append(len(data)) or "text/plain")
+        upload = UploadFile(io.BytesIO(b"x" * (validation.MIME_SNIFF_BYTES * 4)), filename="notes.txt")
+        result = asyncio.run(validate_file_upload(upload))
+        assert seen == [validation.MIME_SNIFF_BYTES]
+        assert result.file.tell() == 0
+
+    def test_oversized_rejected_by_size(self, monkeypatch):
+        """Test that the size limit applies without reading the upload"""
+        monkeypatch.setattr(validation, "MAX_FILE_SIZE_BYTES", 10)
+        upload = UploadFile(io.BytesIO(b"x" * 11), filename="notes.txt")
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(validate_file_upload(upload))
+        assert exc_info.value.status_code == 413
+
+    def test_missing_filename_rejected(self):
+        """Test that an upload with an empty filename is a client error"""
+        upload = UploadFile(io.BytesIO(b"text"), filename="")
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(validate_file_upload(upload))
+        assert exc_info.value.status_code == 400
+
+
+class TestUploadSizeLimitMiddleware:
+    """Tests for rejecting oversized uploads before their body is read"""
+
+    @staticmethod
+    def _call(content_length, path="/upload"):
+        """Run one request through the middleware; returns (status, whether the app ran)"""
+        reached = []
+
+        async def app(scope, receive, send):
+            reached.append(True)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def receive():
+            raise AssertionError("body was read")
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+        scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+        asyncio.run(UploadSizeLimitMiddleware(app, max_size=1000)(scope, receive, send))
+        return sent[0]["status"], bool(reached)
+
+    def test_oversized_upload_rejected_unread(self):
+        """Test that a declared length past the limit gets a 413 without reading the body"""
+        assert self._call(1000 + validation.MULTIPART_OVERHEAD_BYTES + 1) == (413, False)
+
+    def test_within_limit_passes(self):
+        """Test that uploads within the limit, or of unknown length, reach the app"""
+        assert self._call(1000) == (200, True)
+        assert self._call(None) == (200, True)
+
+    def test_other_paths_untouched(self):
+        """Test that only upload paths are limited"""
+        assert self._call(10 ** 9, path="/ask") == (200, True)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
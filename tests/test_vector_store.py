@@ -0,0 +1,328 @@
+"""
+Unit tests for vector store write paths
+"""
+import threading
+import pytest
+from rag_system.core.retrieval.vector_store import ChromaVectorStore, BatchWriter, EmbeddingService
+from rag_system.core.utils.cache import TTLCache
+
+
+class FakeCollection:
+    """Collection stub that rejects any batch containing a poisoned id"""
+
+    def __init__(self, bad_ids=()):
+        self.bad_ids = set(bad_ids)
+        self.stored = {}
+        self.stored_metadatas = {}
+        self.calls = 0
+        self.batches = []
+
+    def upsert(self, documents, metadatas, ids, embeddings=None):
+        self.calls += 1
+        self.embeddings = embeddings
+        self.batches.append(documents)
+        if self.bad_ids.intersection(ids):
+            raise RuntimeError("rejected batch")
+        self.stored.update(zip(ids, documents))
+        self.stored_metadatas.update(zip(ids, metadatas))
+
+    def update(self, ids, metadatas):
+        self.updated = list(ids)
+        self.stored_metadatas.update(zip(ids, metadatas))
+
+    def get(self, ids, include):
+        found = [i for i in ids if i in self.stored]
+        return {'ids': found, 'metadatas': [self.stored_metadatas[i] for i in found]}
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """Build a ChromaVectorStore around a fake collection; only the version file touches disk"""
+    def _make(bad_ids=()):
+        store = ChromaVectorStore.__new__(ChromaVectorStore)
+        store.collection = FakeCollection(bad_ids)
+        store.embedded = []
+        store.embedding_function = lambda texts: store.embedded.extend(texts) or [[0.5] for _ in texts]
+        store._query_embeddings = TTLCache(maxsize=8, ttl=60)
+        store._search_results = TTLCache(maxsize=8, ttl=60)
+        store.version_file_path = tmp_path / "collection.version"
+        store._results_version = store.data_version()
+        return store
+    return _make
+
+
+class TestUpsertBisect:
+    """Tests for isolating bad documents in a failed batch"""
+
+    def test_bad_document_isolated(self, make_store):
+        """Test that only the poisoned document is skipped"""
+        store = make_store(bad_ids={"d5"})
+        ids = [f"d{i}" for i in range(16)]
+        added = store._upsert_bisect([f"text {i}" for i in range(16)], [{}] * 16, ids)
+        assert added == 15
+        assert "d5" not in store.collection.stored
+        assert len(store.collection.stored) == 15
+
+    def test_fewer_calls_than_per_document(self, make_store):
+        """Test that bisection needs fewer upserts than retrying each document"""
+        store = make_store(bad_ids={"d3"})
+        ids = [f"d{i}" for i in range(64)]
+        store._upsert_bisect(["x"] * 64, [{}] * 64, ids)
+        assert store.collection.calls < 64
+
+
+class TestAddDocuments:
+    """Tests for batched document writes"""
+
+    def test_documents_embedded_by_query_service(self, make_store):
+        """Test that documents are embedded by the same service as queries, not the collection"""
+        store = make_store()
+        store.lock = threading.Lock()
+        store.add_documents(["FastAPI routing"], [{}], ["d1"])
+        assert store.embedded == ["FastAPI routing"]
+        assert store.collection.embeddings == [[0.5]]
+
+    def test_batches_grouped_by_length(self, make_store):
+        """Test that multi-batch writes group similar lengths and keep ids with their text"""
+        store = make_store()
+        store.lock = threading.Lock()
+        texts = ["x" * ((n * 37) % 400 + 1) for n in range(450)]
+        ids = [f"d{n}" for n in range(450)]
+        assert store.add_documents(texts, [{} for _ in texts], ids) == 450
+        assert store.collection.stored == dict(zip(ids, texts))
+        lengths = [len(t) for batch in store.collection.batches for t in batch]
+        assert lengths == sorted(lengths)
+
+
+class TestSearch:
+    """Tests for similarity search queries"""
+
+    def test_duplicate_content_kept(self, make_store):
+        """Test that hits sharing text under different ids are all returned in rank order"""
+        store = make_store()
+        store.collection.query = lambda **kwargs: {
+            'documents': [["FastAPI routing", "FastAPI routing", "Path params"]],
+            'metadatas': [[{'id': 1}, {'id': 2}, {'id': 3}]],
+            'distances': [[0.1, 0.2, 0.3]],
+        }
+        results = store.search("how does routing work")
+        assert [r['metadata']['id'] for r in results] == [1, 2, 3]
+
+    def test_precomputed_embedding_reused(self, make_store):
+        """Test that a passed query embedding is sent without embedding again"""
+        store = make_store()
+        calls = []
+        store.collection.query = lambda **kwargs: calls.append(kwargs) or {
+            'documents': [[]], 'metadatas': [[]], 'distances': [[]]
+        }
+        store.search("how does routing work", query_embedding=[0.1, 0.2])
+        assert calls[0]['query_embeddings'] == [[0.1, 0.2]]
+        assert 'query_texts' not in calls[0]
+        assert store.embedded == []
+
+    def test_repeated_query_embedded_once(self, make_store):
+        """Test that back-to-back searches for one query share its embedding"""
+        store = make_store()
+        store.collection.query = lambda **kwargs: {'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        store.search("how does routing work")
+        store.embed_query("how does routing work")
+        assert store.embedded == ["how does routing work"]
+
+
+class TestSearchResultCache:
+    """Tests for reusing formatted search results"""
+
+    @pytest.fixture
+    def store(self, make_store):
+        """Store whose collection counts similarity queries"""
+        store = make_store()
+        store.lock = threading.Lock()
+        store.queries = 0
+
+        def query(**kwargs):
+            store.queries += 1
+            rows = len(kwargs['query_embeddings'])
+            return {'documents': [["FastAPI routing"]] * rows, 'metadatas': [[{'id': 1}]] * rows,
+                    'distances': [[0.1]] * rows}
+
+        store.collection.query = query
+        return store
+
+    def test_repeat_served_from_cache(self, store):
+        """Test that a repeated search skips the collection and returns private copies"""
+        first = store.search("how does routing work", k=3)
+        first[0]['metadata']['id'] = 99
+        second = store.search("how does routing work", k=3)
+        assert store.queries == 1
+        assert second[0]['metadata']['id'] == 1
+        store.search("how does routing work", k=4)
+        assert store.queries == 2
+
+    def test_batch_is_one_query(self, store):
+        """Test that a batch embeds and searches its uncached queries in one call each"""
+        store.search("how does routing work")
+        queries = ["how does routing work", "what are path params", "how are forms parsed"]
+        results = store.search_batch(queries)
+        assert store.queries == 2
+        assert store.embedded == queries
+        assert all(r[0]['metadata'] == {'id': 1} for r in results)
+
+    def test_write_clears_cache(self, store):
+        """Test that adding documents makes the next search hit the collection"""
+        store.search("how does routing work")
+        store.add_documents(["New doc"], [{}], ["d1"])
+        store.search("how does routing work")
+        assert store.queries == 2
+
+    def test_write_by_another_process_clears_cache(self, store, make_store):
+        """Test that a write through another store on the same collection invalidates cached results"""
+        store.search("how does routing work")
+        other = make_store()
+        other.lock = threading.Lock()
+        other.add_documents(["New doc"], [{}], ["d1"])
+        store.search("how does routing work")
+        store.search("how does routing work")
+        assert store.queries == 2
+
+
+class TestGetByMetadata:
+    """Tests for metadata-only lookups"""
+
+    def test_no_similarity_query(self, make_store):
+        """Test that lookups go through collection.get and never embed a query"""
+        store = make_store()
+        calls = []
+        store.collection.get = lambda **kwargs: calls.append(kwargs) or {
+            'documents': ["FastAPI intro"], 'metadatas': [{'technology': 'fastapi'}]
+        }
+        store.collection.query = lambda **kwargs: pytest.fail("similarity search used")
+        results = store.get_by_metadata({"technology": "fastapi"}, limit=5)
+        assert results == [{'content': "FastAPI intro", 'metadata': {'technology': 'fastapi'}}]
+        assert calls[0]['where'] == {"technology": "fastapi"} and calls[0]['limit'] == 5
+
+    def test_metadata_sample_skips_documents(self, make_store):
+        """Test that sampling metadata never asks Chroma for document text"""
+        store = make_store()
+        calls = []
+        store.collection.get = lambda **kwargs: calls.append(kwargs) or {'metadatas': [{'source': 'fastapi'}, None]}
+        assert store.sample_metadatas({"source": "fastapi"}, limit=2) == [{'source': 'fastapi'}, {}]
+        assert calls[0]['include'] == ["metadatas"]
+
+
+class TestCollectionStats:
+    """Tests for collection statistics"""
+
+    def test_metadata_only_sample(self, make_store):
+        """Test that the source sample fetches metadata without document text"""
+        store = make_store()
+        calls = []
+        store.collection.count = lambda: 2
+        store.collection.get = lambda **kwargs: calls.append(kwargs) or {
+            'ids': ["a", "b"], 'metadatas': [{'source': 'fastapi'}, {'source': 'fastapi'}]
+        }
+        stats = store.get_collection_stats()
+        assert stats == {'total_chunks': 2, 'sources': {'fastapi': 2}, 'sample_size': 2}
+        assert calls[0]['include'] == ["metadatas"]
+
+
+class TestAddChunks:
+    """Tests for adding chunker output in one call"""
+
+    def test_single_batched_write(self, make_store, monkeypatch):
+        """Test that all chunks reach add_documents together with positional ids"""
+        store = make_store()
+        calls = []
+        monkeypatch.setattr(store, "add_documents", lambda t, m, i: calls.append((t, m, i)) or len(t))
+        chunks = [{'content': f"c{n}", 'metadata': {'n': n}} for n in range(3)]
+        assert store.add_chunks(chunks, "upload_a.txt") == 3
+        assert calls == [(["c0", "c1", "c2"], [{'n': 0}, {'n': 1}, {'n': 2}],
+                          ["upload_a.txt_0", "upload_a.txt_1", "upload_a.txt_2"])]
+
+    def test_unchanged_chunks_skipped(self, make_store):
+        """Test that a re-upload only writes chunks whose content changed"""
+        store = make_store()
+        store.lock = threading.Lock()
+        chunks = [{'content': f"c{n}", 'metadata': {'chunk_id': f"h{n}"}} for n in range(3)]
+        assert store.add_chunks(chunks, "upload_a.txt") == 3
+        chunks[1] = {'content': "changed", 'metadata': {'chunk_id': "h-new"}}
+        assert store.add_chunks(chunks, "upload_a.txt") == 3
+        assert store.collection.batches[-1] == ["changed"]
+
+    def test_unchanged_chunks_get_new_metadata(self, make_store):
+        """Test that re-uploading the same content under a new source updates metadata without re-embedding"""
+        store = make_store()
+        store.lock = threading.Lock()
+        chunks = [{'content': f"c{n}", 'metadata': {'chunk_id': f"h{n}", 'source': "old"}} for n in range(2)]
+        store.add_chunks(chunks, "upload_a.txt")
+        for chunk in chunks:
+            chunk['metadata']['source'] = "new"
+        assert store.add_chunks(chunks, "upload_a.txt") == 2
+        assert store.collection.calls == 1
+        assert store.collection.updated == ["upload_a.txt_0", "upload_a.txt_1"]
+        assert store.collection.stored_metadatas["upload_a.txt_1"]['source'] == "new"
+
+
+class TestBatchWriter:
+    """Tests for the background batch writer"""
+
+    class RecordingStore:
+        """Store stub that records batches and fails on request"""
+
+        def __init__(self):
+            self.batches = []
+
+        def add_documents(self, texts, metadatas, ids):
+            if "boom" in ids:
+                raise RuntimeError("write failed")
+            self.batches.append(ids)
+            return len(ids)
+
+    def test_batches_written_in_order(self):
+        """Test that every submitted batch is written before close returns"""
+        store = self.RecordingStore()
+        with BatchWriter(store, max_pending=2) as writer:
+            for n in range(10):
+                writer.submit([f"t{n}"], [{}], [f"id{n}"])
+        assert writer.added == 10
+        assert store.batches == [[f"id{n}"] for n in range(10)]
+
+    def test_errors_collected(self):
+        """Test that a failed batch is reported without stopping the writer"""
+        store = self.RecordingStore()
+        with BatchWriter(store) as writer:
+            writer.submit(["a"], [{}], ["boom"])
+            writer.submit(["b"], [{}], ["ok"])
+        assert writer.added == 1
+        assert len(writer.errors) == 1
+
+
+class TestEmbeddingSharding:
+    """Tests for multi-threaded embedding of large inputs"""
+
+    def test_shards_preserve_order(self):
+        """Test that sharded embedding returns vectors in input order"""
+        calls = []
+
+        def embed(texts):
+            calls.append(len(texts))
+            return [[float(t)] for t in texts]
+
+        service = EmbeddingService(embed, model_name="test")
+        texts = [str(i) for i in range(300)]
+        assert service._embed(texts) == [[float(i)] for i in range(300)]
+        assert len(calls) > 1
+
+    def test_small_input_single_call(self):
+        """Test that small inputs go straight to the base function"""
+        calls = []
+
+        def embed(texts):
+            calls.append(len(texts))
+            return [[0.0] for _ in texts]
+
+        EmbeddingService(embed, model_name="test")._embed(["a", "b"])
+        assert calls == [2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])